@@ -3,16 +3,34 @@ this is the main API file for Faculty Finder application.
 it sets up the FastAPI app and includes the necessary routes.
 '''
 ## DS614-Faculty-Finder/api/main.py
-from fastapi import FastAPI
+from fastapi import FastAPI,HTTPException
+from fastapi.responses import Response
 
 import os 
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from api.routes import router 
+from api import profiling
+from config.settings import PROFILING_ENABLED
 
 app=FastAPI(title="Faculty Finder API",description="API to fetch faculty details",version="1.0.0")
+if PROFILING_ENABLED:
+  app.router.route_class=profiling.ProfiledRoute
+  app.add_middleware(profiling.ProfilingMiddleware)
 app.include_router(router)
 
 @app.get("/",summary="health check endpoint")
 def health_check():
-  return {"status":"ok","message":"Faculty Finder API is running"}
\ No newline at end of file
+  return {"status":"ok","message":"Faculty Finder API is running"}
+
+if PROFILING_ENABLED:
+  @app.get("/admin/profiles",summary="recently profiled requests, newest first")
+  def list_profiles():
+    return {"profiles":profiling.summaries()}
+
+  @app.get("/admin/profiles/{profile_id}",summary="one profile as pstats text")
+  def get_profile(profile_id:int):
+    body=profiling.report(profile_id)
+    if body is None:
+      raise HTTPException(status_code=404,detail="Profile not found")
+    return Response(body,media_type="text/plain; charset=utf-8")
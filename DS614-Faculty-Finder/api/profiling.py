@@ -0,0 +1,89 @@
+"""
+cProfile of single Faculty Finder API requests, to see where a slow one
+spends its time.
+
+A minimal counterpart of the recommender's app/api/profiling.py (the two
+projects are deployed on their own and share no package): a request sending
+the PROFILE_HEADER header has its endpoint run under cProfile, and the last
+PROFILE_BUFFER_SIZE profiles are kept for /admin/profiles as pstats text.
+
+From Python 3.12 only one profiler can be active in a process, so requests
+are profiled one at a time; one that overlaps a profiled request runs
+unprofiled.
+"""
+import cProfile
+import functools
+import inspect
+import io
+import itertools
+import pstats
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+
+from config.settings import PROFILE_HEADER, PROFILE_BUFFER_SIZE
+
+# (summary, profiler) of the latest profiled requests, oldest dropped first
+PROFILES=deque(maxlen=PROFILE_BUFFER_SIZE)
+_ids=itertools.count(1)
+# summary of the request being handled, when it asked to be profiled
+_requested=ContextVar("requested_profile",default=None)
+# held while a profiler is enabled: one at a time in the process
+_active=threading.Lock()
+
+
+def summaries():
+  return [summary for summary,_ in reversed(list(PROFILES))]
+
+
+def report(profile_id,limit=60):
+  """pstats text of a profile, None if it is no longer kept."""
+  profiler=next((p for s,p in list(PROFILES) if s["id"]==profile_id),None)
+  if profiler is None:
+    return None
+  out=io.StringIO()
+  pstats.Stats(profiler,stream=out).sort_stats("cumulative").print_stats(limit)
+  return out.getvalue()
+
+
+class ProfiledRoute(APIRoute):
+  """APIRoute whose (sync) endpoint runs under cProfile when the request asked for it."""
+
+  def __init__(self,path,endpoint,**kwargs):
+    if not inspect.iscoroutinefunction(endpoint):
+      original=endpoint
+
+      @functools.wraps(original)
+      def endpoint(*args,**kwargs):
+        summary=_requested.get()
+        if summary is None or not _active.acquire(blocking=False):
+          return original(*args,**kwargs)
+        profiler=cProfile.Profile()
+        start=time.perf_counter()
+        try:
+          return profiler.runcall(original,*args,**kwargs)
+        finally:
+          _active.release()
+          summary.update(id=next(_ids),duration_ms=round((time.perf_counter()-start)*1000,3))
+          PROFILES.append((summary,profiler))
+    super().__init__(path,endpoint,**kwargs)
+
+
+class ProfilingMiddleware:
+  """Marks the requests sending the profiling header for ProfiledRoute."""
+
+  def __init__(self,app,header=PROFILE_HEADER):
+    self.app=app
+    self.header=header.lower().encode()
+
+  async def __call__(self,scope,receive,send):
+    if scope["type"]!="http" or not any(name==self.header and value not in (b"",b"0") for name,value in scope["headers"]):
+      return await self.app(scope,receive,send)
+    token=_requested.set({"method":scope["method"],"path":scope["path"],"created":time.time()})
+    try:
+      await self.app(scope,receive,send)
+    finally:
+      _requested.reset(token)
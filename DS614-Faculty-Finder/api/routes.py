@@ -4,16 +4,22 @@ Module defining API routes for faculty data retrieval.
 
 import sqlite3
 from fastapi import APIRouter, HTTPException,Query
+from fastapi.routing import APIRoute
 from typing import List, Optional
 from storage.db_connection import SqlConnectionManager
-from config.settings import DATABASE_PATH
+from config.settings import DATABASE_PATH,PROFILING_ENABLED
+from api.profiling import ProfiledRoute
 
-router =APIRouter()
+# ProfiledRoute lets api.profiling run a picked request's endpoint under cProfile
+router =APIRouter(route_class=ProfiledRoute if PROFILING_ENABLED else APIRoute)
 
 DB_PATH=DATABASE_PATH
 
-@router.get("/faculty")# to get all faculty records
-def get_all_faculty_details():
+@router.get("/faculty")# to get all faculty records, or one page of them with limit/offset
+def get_all_faculty_details(
+  limit:Optional[int]=Query(None,ge=1,le=1000,description="page size; omit for all records"),
+  offset:int=Query(0,ge=0,description="records to skip"),
+):
   db=SqlConnectionManager(DB_PATH)
   conn=None
   try:
@@ -28,9 +34,13 @@ def get_all_faculty_details():
                 specialization,
                 bio,
                 research,
-                publications
+                publications,
+                profile_url,
+                photo_url
          FROM faculty
-            """
+         ORDER BY faculty_id
+         LIMIT ? OFFSET ?
+            """,(limit if limit is not None else -1,offset)
     )
     output_resultset=cursor.fetchall()
     results=[
@@ -42,7 +52,9 @@ def get_all_faculty_details():
         "specialization":row[4],
         "bio":row[5],
         "research":row[6],
-        "publications":row[7]
+        "publications":row[7],
+        "profile_url":row[8],
+        "photo_url":row[9]
       }for row in output_resultset
     ]
     return {
@@ -71,7 +83,9 @@ def get_faculty_by_id(faculty_id:str):
                 specialization,
                 bio,
                 research,
-                publications
+                publications,
+                profile_url,
+                photo_url
          FROM faculty
          WHERE faculty_id = ?
             """,(faculty_id,)
@@ -88,7 +102,9 @@ def get_faculty_by_id(faculty_id:str):
         "specialization":output_resultset[4],
         "bio":output_resultset[5],
         "research":output_resultset[6],
-        "publications":output_resultset[7]
+        "publications":output_resultset[7],
+        "profile_url":output_resultset[8],
+        "photo_url":output_resultset[9]
       }
   except HTTPException:
     raise
@@ -10,4 +10,13 @@ PIPELINE_LOG_PATH=os.path.join(LOG_DIR,"pipeline.log")
 
 ENABLE_SCRAPING=True
 ENABLE_TRANSFORMATION=True
-ENABLE_DATABASE_INSERTION=True
\ No newline at end of file
+ENABLE_DATABASE_INSERTION=True
+
+# On-demand profiling of API requests: every request with the PROFILE_HEADER
+# header runs under cProfile, and the last PROFILE_BUFFER_SIZE profiles are
+# served from /admin/profiles.
+# Off by default: the header and the /admin/profiles routes are open to any
+# client, so only set PROFILING_ENABLED=1 on a server you are debugging.
+PROFILING_ENABLED=os.environ.get("PROFILING_ENABLED","0").lower() not in ("0","false","no","")
+PROFILE_HEADER=os.environ.get("PROFILE_HEADER","X-Debug-Profile")
+PROFILE_BUFFER_SIZE=int(os.environ.get("PROFILE_BUFFER_SIZE","20"))
@@ -24,6 +24,24 @@ class DaiictFacultySpider(scrapy.Spider):
             return None
         return re.sub(r"\s+", " ", text).replace("\xa0", " ").strip()
 
+    def photo_url(self, response):
+        """
+        Absolute URL of the profile photo, or None. Stored with the profile
+        so the UI never has to fetch the page again to find it.
+        """
+        src = (
+            response.xpath(
+                "//div[contains(@class,'field--name-field') and "
+                "(contains(@class,'image') or contains(@class,'photo'))]//img/@src"
+            ).get()
+            or response.css("img.faculty-photo::attr(src)").get()
+            or response.css(".profile-image img::attr(src)").get()
+            or response.xpath("//img[contains(translate(@alt,'PHOTO','photo'),'photo')]/@src").get()
+            or response.css("meta[property='og:image']::attr(content)").get()
+        )
+        src = self.clean(src)
+        return response.urljoin(src) if src else None
+
     # ---------- Requests ----------
     def start_requests(self):
         """
@@ -159,6 +177,9 @@ class DaiictFacultySpider(scrapy.Spider):
                 if self.clean(li.xpath("string()").get())
             ] or None
 
+            # PHOTO
+            photo_url = self.photo_url(response)
+
             yield {
                 "name": name,
                 "phd_field": education,
@@ -168,6 +189,7 @@ class DaiictFacultySpider(scrapy.Spider):
                 "research": research,
                 "publications": publications,
                 "profile_url": response.url,
+                "photo_url": photo_url,
             }
 
         except DropItem:
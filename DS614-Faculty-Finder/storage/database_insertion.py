@@ -26,7 +26,8 @@ REQUIRED_COLUMNS = [
     "bio",
     "research",
     "publications",
-    "combined_text"
+    "combined_text",
+    "profile_url"
 ]
 
 class DataInsertion:
@@ -57,8 +58,9 @@ class DataInsertion:
         self.db.create_tables()
         df = self.load_csv(csv_path)
 
+        # a rerun replaces the stored profiles instead of failing on their ids
         insert_query = """
-        INSERT INTO faculty (
+        INSERT OR REPLACE INTO faculty (
             faculty_id,
             name,
             mail,
@@ -67,8 +69,10 @@ class DataInsertion:
             bio,
             research,
             publications,
-            combined_text
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            combined_text,
+            profile_url,
+            photo_url
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
 
         conn = None
@@ -95,6 +99,9 @@ class DataInsertion:
                             if isinstance(row["publications"], list)
                             else row["publications"],
                             row["combined_text"],
+                            row["profile_url"],
+                            # crawls before the spider stored photos have no column
+                            row.get("photo_url"),
                         ),
                     )
                     inserted_count += 1
@@ -17,8 +17,12 @@ specialization TEXT,
 bio TEXT,
 research TEXT,
 publications TEXT,
-combined_text TEXT
+combined_text TEXT,
+profile_url TEXT,
+photo_url TEXT
 )"""
+# columns added after the first release; create_tables adds them to older databases
+ADDED_COLUMNS={"profile_url":"TEXT","photo_url":"TEXT"}
 class SqlConnectionManager:
   def __init__(self,db_path:str):
     self.db_path=Path(db_path)
@@ -41,6 +45,10 @@ class SqlConnectionManager:
     try:
       conn=self.connection()
       conn.execute(FACULTY_TABLE_DDL)
+      existing={row[1] for row in conn.execute("PRAGMA table_info(faculty)")}
+      for column,column_type in ADDED_COLUMNS.items():
+        if column not in existing:
+          conn.execute(f"ALTER TABLE faculty ADD COLUMN {column} {column_type}")
       conn.commit()
       logger.info("Faculty table created or already exists.")
     except Exception as e:
@@ -1,16 +1,11 @@
 import streamlit as st
 import sys
 from pathlib import Path
-import hashlib
-import requests
-from bs4 import BeautifulSoup
+import threading
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
 
-from recommender.similarity import get_recommendations
-from recommender.query_parser import parse_query
-
 st.set_page_config(
     page_title="DAIICT Faculty Finder",
     page_icon="🎓",
@@ -25,40 +20,33 @@ if css_path.exists():
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
 # ---------- Helper Functions ----------
-@st.cache_data(ttl=3600)
-def get_faculty_photo(name, profile_url):
-    """Scrape faculty photo from DAIICT profile page"""
-    if not profile_url or profile_url == "-":
-        return f"https://ui-avatars.com/api/?name={name.replace(' ', '+')}&size=200&background=6366f1&color=fff&bold=true"
-        
-    try:
-        response = requests.get(profile_url, timeout=5)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Try to find the faculty photo - adjust selector based on actual page structure
-            # Common patterns for faculty photos on academic sites
-            img = soup.find('img', class_='faculty-photo') or \
-                  soup.find('img', alt=lambda x: x and 'photo' in x.lower()) or \
-                  soup.select_one('.profile-image img') or \
-                  soup.select_one('img[src*="faculty"]') or \
-                  soup.select_one('img[src*="staff"]')
-            
-            if img and img.get('src'):
-                img_url = img['src']
-                # Make absolute URL if relative
-                if img_url.startswith('/'):
-                    img_url = f"https://www.daiict.ac.in{img_url}"
-                elif not img_url.startswith('http'):
-                    # Handle other relative paths if needed
-                    base_url = "/".join(profile_url.split("/")[:3])
-                    img_url = f"{base_url}/{img_url.lstrip('/')}"
-                return img_url
-    except Exception:
-        pass
-    
-    # Fallback to initials-based avatar
-    return f"https://ui-avatars.com/api/?name={name.replace(' ', '+')}&size=200&background=6366f1&color=fff&bold=true"
+@st.cache_resource
+def get_engine():
+    """
+    The search engine shared by every session and rerun: the index is loaded
+    once per process, and results are ranked exactly as the API ranks them.
+    A changed index file is swapped in by the engine's background watcher,
+    as in the API, so a rerun never waits for a reload.
+    """
+    from app import engine
+    engine.start_watcher()
+    return engine
+
+@st.cache_resource
+def get_thumbnails():
+    """
+    Photos are only read from the disk cache here, never fetched while a
+    page renders; a background job fills the cache once per process.
+    """
+    from recommender.thumbnails import ThumbnailCache, prefetch
+    from config.settings import THUMBNAIL_PREFETCH
+
+    cache = ThumbnailCache()
+    if THUMBNAIL_PREFETCH:
+        rows = get_engine().INDEX.meta
+        threading.Thread(target=prefetch, args=(rows,), kwargs={"cache": cache},
+                         name="photo-prefetch", daemon=True).start()
+    return cache
 
 def extract_keywords(text, max_keywords=8):
     if not text or text == "-":
@@ -146,10 +134,15 @@ if search_clicked or query:
             st.warning("⚠️ Please enter a research interest or keyword")
         st.stop()
     
-    clean_query, top_k = parse_query(query)
-    
     with st.spinner("🔍 Analyzing faculty profiles..."):
-        results = get_recommendations(clean_query, top_k)
+        # "top N" is parsed by the engine, as for /recommend
+        results, corrections = get_engine().search_corrected(query, details=True)
+    
+    if corrections:
+        # corrections are keyed on query tokens, so list them rather than
+        # rewrite the typed text
+        fixed = ", ".join(f"**{term}** instead of *{typed}*" for typed, term in corrections.items())
+        st.info(f"🔤 Showing results for {fixed}")
     
     if not results:
         st.error("❌ No matching faculty found. Try different keywords.")
@@ -167,10 +160,10 @@ if search_clicked or query:
             with col_avatar:
                 name = faculty.get('name', 'Faculty')
                 profile_url = faculty.get("profile_url", "")
-                photo_url = get_faculty_photo(name, profile_url)
+                photo_src = get_thumbnails().photo_src(name, profile_url)
                 st.markdown(f"""
                 <div class="avatar-container">
-                    <img src="{photo_url}" class="avatar-img" alt="{name}">
+                    <img src="{photo_src}" class="avatar-img" alt="{name}">
                 </div>
                 """, unsafe_allow_html=True)
             
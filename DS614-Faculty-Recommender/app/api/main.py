@@ -1,15 +1,242 @@
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-import json
+import hmac
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
 
-from app.engine import search
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel
 
-app = FastAPI(title="Faculty Recommender")
+from app import engine
+from app.api.responses import JSON, negotiate, parse_fields, project, encode
+from app.engine import search_corrected, search_batch_corrected, CACHE
+from recommender.field_index import parse_weights
+from recommender.filters import SearchFilter, split_values
+from recommender.search_index import BACKENDS
+from recommender.suggest import MAX_LIMIT
+from app.api import profiling
+from recommender import metrics
+from config.settings import ADMIN_TOKEN, METRICS_ENABLED, PROFILING_ENABLED
+
+
+@asynccontextmanager
+async def lifespan(app):
+    engine.start_watcher()
+    yield
+    engine.stop_watcher()
+
+
+class ServerTimingMiddleware:
+    """
+    Times every HTTP request, adds its stage timings as a Server-Timing
+    header and records its duration by route on /metrics.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = metrics.timed_request()
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                value = metrics.server_timing(timings, time.perf_counter() - start)
+                message["headers"] = [*message.get("headers", []), (b"server-timing", value.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            # the route template, so /admin/faculty/{faculty_id} is one series
+            route = scope.get("route")
+            metrics.REQUESTS.observe(time.perf_counter() - start, getattr(route, "path", "other"))
+
+
+app = FastAPI(title="Faculty Recommender", lifespan=lifespan)
+if METRICS_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+if PROFILING_ENABLED:
+    # endpoints declared below can run under a request's profiler
+    app.router.route_class = profiling.ProfiledRoute
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+
+class BatchRequest(BaseModel):
+    queries: List[str]
+    backend: Optional[str] = None
+    weights: Optional[str] = None
+    alpha: Optional[float] = None
+    fields: Optional[str] = None
+    phd_field: Optional[str] = None
+    category: Optional[str] = None
+    must: Optional[str] = None
+    exclude: Optional[str] = None
+
+
+class FacultyProfile(BaseModel):
+    name: str
+    mail: str = ""
+    phd_field: str = ""
+    specialization: str = ""
+    bio: str = ""
+    research: str = ""
+    publications: str = ""
+    profile_url: str = ""
+    photo_url: str = ""
+
+
+def scoring_options(backend, weights, alpha=None):
+    # weights ("name:4,research:3,...") select BM25F and alpha the hybrid
+    # backend, unless a backend is given
+    if backend is not None and backend not in BACKENDS:
+        raise HTTPException(status_code=422, detail=f"Unknown backend: {backend} (expected one of {', '.join(BACKENDS)})")
+    if alpha is not None:
+        if not 0 <= alpha <= 1:
+            raise HTTPException(status_code=422, detail="alpha must be between 0 and 1")
+        backend = backend or "hybrid"
+    if weights is None:
+        return backend, None
+    try:
+        return backend or "bm25f", parse_weights(weights)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def search_filter(phd_field, category, must, exclude):
+    # each option is a comma-separated list, e.g. category=faculty,adjunct-faculty
+    return SearchFilter(split_values(phd_field), split_values(category), split_values(must), split_values(exclude))
+
+
+def correction_header(corrections):
+    # misspelt query tokens and the terms searched instead: "machin=machine, lerning=learning"
+    return ", ".join(f"{typed}={term}" for typed, term in corrections.items())
 
 
 @app.get("/recommend")
-def recommend(q: str):
-    results = search(q)
-    return JSONResponse(
-        content=json.loads(json.dumps(results, indent=2))
+def recommend(
+    q: str,
+    backend: Optional[str] = None,
+    weights: Optional[str] = None,
+    alpha: Optional[float] = None,
+    phd_field: Optional[str] = None,
+    category: Optional[str] = None,
+    must: Optional[str] = None,
+    exclude: Optional[str] = None,
+    fields: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    # JSON by default; NDJSON (one hit per line) or msgpack by Accept header.
+    # fields=name,score keeps only those keys of each hit. Corrected typos
+    # are listed in the X-Query-Corrections header.
+    backend, field_weights = scoring_options(backend, weights, alpha)
+    keep = parse_fields(fields)
+    try:
+        results, corrections = search_corrected(
+            q, backend, field_weights, search_filter(phd_field, category, must, exclude), alpha,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    with metrics.stage("serialize"):
+        response = encode(project(results, keep), negotiate(accept))
+    if corrections:
+        response.headers["X-Query-Corrections"] = correction_header(corrections)
+    return response
+
+
+@app.post("/recommend/batch")
+def recommend_batch(body: BatchRequest, accept: Optional[str] = Header(None)):
+    # NDJSON writes one {"query", "corrections", "results"} line per query
+    backend, field_weights = scoring_options(body.backend, body.weights, body.alpha)
+    keep = parse_fields(body.fields)
+    try:
+        results, corrections = search_batch_corrected(
+            body.queries, backend, field_weights,
+            search_filter(body.phd_field, body.category, body.must, body.exclude), body.alpha,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    per_query = [
+        {"query": q, "corrections": c, "results": project(r, keep)}
+        for q, c, r in zip(body.queries, corrections, results)
+    ]
+    with metrics.stage("serialize"):
+        return encode({"count": len(results), "results": per_query}, negotiate(accept), per_query)
+
+
+@app.get("/suggest")
+def suggest(prefix: str, limit: int = Query(10, ge=1, le=MAX_LIMIT)):
+    # cheap enough to call on every keystroke; never runs the scorer
+    return encode({"prefix": prefix, "suggestions": engine.suggest(prefix, limit)}, JSON)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(
+        metrics.render(engine.metrics_gauges()), media_type="text/plain; version=0.0.4; charset=utf-8",
     )
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return CACHE.stats()
+
+
+@app.get("/admin/index")
+def index_status():
+    return engine.index_status()
+
+
+if PROFILING_ENABLED:
+    # no hook and no routes unless enabled: they are open to any client
+    @app.get("/admin/profiles")
+    def list_profiles():
+        # newest first; profile a request by sending the PROFILE_HEADER header
+        return {"sample_rate": profiling.PROFILES.sample_rate, "profiles": profiling.PROFILES.summaries()}
+
+    @app.get("/admin/profiles/{profile_id}")
+    def get_profile(profile_id: int, format: str = "text"):
+        # text (pstats report), pstats (binary dump) or collapsed (flamegraph input)
+        profile = profiling.PROFILES.get(profile_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        try:
+            body, media_type = profiling.render(profile, format)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return Response(body, media_type=media_type)
+
+    @app.put("/admin/profiling")
+    def set_profiling(sample_rate: float = Query(..., ge=0, le=1)):
+        profiling.PROFILES.sample_rate = sample_rate
+        return {"sample_rate": sample_rate, "enabled": PROFILING_ENABLED}
+
+
+def require_admin(authorization: Optional[str] = Header(None)):
+    expected = f"Bearer {ADMIN_TOKEN}".encode()
+    if not hmac.compare_digest((authorization or "").encode(), expected):
+        raise HTTPException(status_code=401, detail="Admin token required", headers={"WWW-Authenticate": "Bearer"})
+
+
+if ADMIN_TOKEN:
+    # routes that change what is served: none unless a token is configured
+    @app.post("/admin/reload", status_code=202, dependencies=[Depends(require_admin)])
+    def reload_index():
+        # the new index is loaded in the background; poll /admin/index for progress
+        started = engine.reload_index()
+        return {"started": started, **engine.index_status()}
+
+    @app.put("/admin/faculty/{faculty_id}", status_code=202, dependencies=[Depends(require_admin)])
+    def upsert_faculty(faculty_id: str, profile: FacultyProfile):
+        engine.upsert_faculty({"faculty_id": faculty_id, **profile.model_dump()})
+        return {"faculty_id": faculty_id, "status": "pending"}
+
+    @app.delete("/admin/faculty/{faculty_id}", status_code=202, dependencies=[Depends(require_admin)])
+    def delete_faculty(faculty_id: str):
+        if not engine.delete_faculty(faculty_id):
+            raise HTTPException(status_code=404, detail="Faculty not found")
+        return {"faculty_id": faculty_id, "status": "pending"}
@@ -0,0 +1,271 @@
+"""
+On-demand cProfile of API requests.
+
+ProfilingMiddleware picks the requests to profile: a random
+PROFILE_SAMPLE_RATE share of them (changeable at runtime through
+PUT /admin/profiling), and every request sending the PROFILE_HEADER
+header. The endpoint of a picked request runs under cProfile, which is
+enabled in the thread that runs it (sync endpoints run in a threadpool,
+and before Python 3.12 cProfile only sees the thread it is enabled in),
+so ProfiledRoute wraps every endpoint for that.
+
+From Python 3.12 only one profiler can be active in a process: enabling a
+second one raises ValueError. Profiling is therefore one request at a
+time, and a picked request that arrives while another one is profiled
+runs unprofiled (and is not filed) instead of failing.
+
+The last PROFILE_BUFFER_SIZE profiles are kept in memory (PROFILES) and
+served as pstats text, as a binary pstats dump (`python -m pstats file`,
+snakeviz) or as collapsed stacks for flamegraph.pl / speedscope.
+
+A request that is not picked costs one header scan and one ContextVar
+lookup.
+"""
+import cProfile
+import functools
+import inspect
+import io
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+
+from config.settings import PROFILE_SAMPLE_RATE, PROFILE_HEADER, PROFILE_BUFFER_SIZE
+
+FORMATS = ("text", "pstats", "collapsed")
+
+# the profile of the request being handled, when it was picked
+_current = ContextVar("current_profile", default=None)
+# held while a profiler is enabled: one at a time in the process
+_active = threading.Lock()
+
+
+class RequestProfile:
+    """cProfile stats of one request's endpoint, with what the request was."""
+
+    def __init__(self, method, path, trigger):
+        self.id = None
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.created = time.time()
+        self.status = None
+        self.duration = None
+        self.profiler = None
+
+    def run(self, fn, *args, **kwargs):
+        # fn runs unprofiled while another request holds the profiler
+        if not _active.acquire(blocking=False):
+            return fn(*args, **kwargs)
+        try:
+            profiler = self.profiler = self.profiler or cProfile.Profile()
+            profiler.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.disable()
+        finally:
+            _active.release()
+
+    async def run_async(self, fn, *args, **kwargs):
+        # other requests' tasks running in between are profiled too
+        if not _active.acquire(blocking=False):
+            return await fn(*args, **kwargs)
+        try:
+            profiler = self.profiler = self.profiler or cProfile.Profile()
+            profiler.enable()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                profiler.disable()
+        finally:
+            _active.release()
+
+    def stats(self):
+        # {func: (cc, nc, tt, ct, callers)}, the data of a pstats dump
+        if self.profiler is None:
+            return {}
+        self.profiler.create_stats()
+        return self.profiler.stats
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "created": self.created,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+        }
+
+
+class ProfileBuffer:
+    """The most recent profiles, oldest dropped first."""
+
+    def __init__(self, maxsize=PROFILE_BUFFER_SIZE, sample_rate=PROFILE_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._profiles = deque(maxlen=maxsize)
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        with self._lock:
+            profile.id = self._next_id
+            self._next_id += 1
+            self._profiles.append(profile)
+
+    def get(self, profile_id):
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def summaries(self):
+        with self._lock:
+            profiles = list(self._profiles)
+        return [p.summary() for p in reversed(profiles)]
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+PROFILES = ProfileBuffer()
+
+
+def pstats_text(stats, sort="cumulative", limit=60):
+    out = io.StringIO()
+    p = pstats.Stats(stream=out)
+    p.stats = stats
+    p.get_top_level_stats()
+    p.sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def pstats_dump(stats):
+    # what pstats.Stats.dump_stats writes
+    return marshal.dumps(stats)
+
+
+def frame_label(func):
+    filename, lineno, name = func
+    if filename == "~":  # built-in
+        return name.replace(";", ",")
+    return f"{name} ({os.path.basename(filename)}:{lineno})".replace(";", ",")
+
+
+def collapsed_stacks(stats, min_seconds=1e-6):
+    """
+    Collapsed-stack lines ("outer;inner;leaf microseconds") built from the
+    call graph. cProfile keeps times per caller -> callee edge, not per
+    stack, so a function's time is split over its stacks in proportion to
+    the time each caller spent in it; paths under min_seconds are dropped.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    totals = {}
+    todo = [((f,), s[3]) for f, s in stats.items() if not s[4]]
+    while todo:
+        path, seconds = todo.pop()
+        func = path[-1]
+        _, _, tt, ct, _ = stats[func]
+        share = seconds / ct if ct else 0
+        key = ";".join(map(frame_label, path))
+        totals[key] = totals.get(key, 0) + tt*share
+        for callee, edge_ct in callees.get(func, ()):
+            if callee not in path and edge_ct*share >= min_seconds:
+                todo.append((path + (callee,), edge_ct*share))
+
+    return "".join(
+        f"{stack} {round(seconds * 1e6)}\n"
+        for stack, seconds in sorted(totals.items())
+        if round(seconds * 1e6) > 0
+    )
+
+
+def render(profile, fmt="text"):
+    """(body, media type) of a profile in one of FORMATS."""
+    stats = profile.stats()
+    if fmt == "pstats":
+        return pstats_dump(stats), "application/octet-stream"
+    if fmt == "collapsed":
+        return collapsed_stacks(stats), "text/plain; charset=utf-8"
+    if fmt == "text":
+        return pstats_text(stats), "text/plain; charset=utf-8"
+    raise ValueError(f"Unknown profile format: {fmt} (expected one of {', '.join(FORMATS)})")
+
+
+def profiled(endpoint):
+    """endpoint, run under the current request's profiler when it has one."""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                return await endpoint(*args, **kwargs)
+            return await profile.run_async(endpoint, *args, **kwargs)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                return endpoint(*args, **kwargs)
+            return profile.run(endpoint, *args, **kwargs)
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose endpoint can be profiled; set as the router's route_class."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, profiled(endpoint), **kwargs)
+
+
+class ProfilingMiddleware:
+    """Picks the requests to profile and files their profiles in a ProfileBuffer."""
+
+    def __init__(self, app, buffer=PROFILES, header=PROFILE_HEADER):
+        self.app = app
+        self.buffer = buffer
+        self.header = header.lower().encode()
+
+    def trigger(self, scope):
+        for name, value in scope["headers"]:
+            if name == self.header and value not in (b"", b"0"):
+                return "header"
+        rate = self.buffer.sample_rate
+        if rate and random.random() < rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trigger = self.trigger(scope)
+        if trigger is None:
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(scope["method"], scope["path"], trigger)
+        token = _current.set(profile)
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current.reset(token)
+            profile.duration = time.perf_counter() - start
+            if profile.profiler is not None:
+                self.buffer.add(profile)
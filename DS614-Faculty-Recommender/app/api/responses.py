@@ -0,0 +1,92 @@
+"""
+Response encoding for the recommendation endpoints.
+
+Results are plain lists of dicts, encoded once straight to bytes: with
+orjson when it is installed (the json module otherwise), as NDJSON, or as
+msgpack when the client asks for it in the Accept header and msgpack is
+installed.
+"""
+import json
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: the json module is slower but equivalent
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: msgpack is only offered when installed
+    msgpack = None
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+MSGPACK = "application/msgpack"
+
+# media types a client may ask for -> the one sent back
+MEDIA_TYPES = {JSON: JSON, NDJSON: NDJSON}
+if msgpack is not None:
+    MEDIA_TYPES.update({MSGPACK: MSGPACK, "application/x-msgpack": MSGPACK})
+
+RESULT_FIELDS = ("name", "faculty_id", "score")
+
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def negotiate(accept):
+    """Media type for an Accept header: the client's most preferred one we support, else JSON."""
+    ranked = []
+    for n, part in enumerate((accept or "").split(",")):
+        media, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for p in params:
+            name, _, value = p.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0
+        if media in MEDIA_TYPES and q > 0:
+            ranked.append((-q, n, MEDIA_TYPES[media]))
+    return min(ranked)[2] if ranked else JSON
+
+
+def parse_fields(text):
+    """ "name,score" -> ("name", "score"); None keeps every field. 422 for unknown fields."""
+    if text is None:
+        return None
+    fields = tuple(f.strip() for f in text.split(",") if f.strip())
+    unknown = set(fields) - set(RESULT_FIELDS)
+    if unknown or not fields:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown field(s): {', '.join(sorted(unknown)) or '(none given)'} (expected {', '.join(RESULT_FIELDS)})",
+        )
+    return fields
+
+
+def project(results, fields):
+    if fields is None:
+        return results
+    return [{f: r[f] for f in fields} for r in results]
+
+
+def encode(body, media_type, items=None):
+    """
+    Response for body. NDJSON writes one line per element of items (body
+    itself when not given), so a list of hits streams one hit per line.
+    """
+    if media_type == NDJSON:
+        lines = body if items is None else items
+        content = b"".join(dumps(x) + b"\n" for x in lines)
+    elif media_type == MSGPACK:
+        content = msgpack.packb(body)
+    else:
+        content = dumps(body)
+    return Response(content=content, media_type=media_type)
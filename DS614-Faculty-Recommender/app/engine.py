@@ -1,42 +1,360 @@
-import pickle
+import logging
+import threading
+import time
 
 from recommender.preprocessing import preprocess
-from recommender.vectorizer import compute_tf, compute_tfidf
-from recommender.similarity import cosine
+from recommender.search_index import load_search_index, active_index_file, index_file_version
+from recommender.result_cache import ResultCache, cache_key
 from recommender.query_parser import parse_query
-from config.settings import INDEX_FILE
+from recommender.incremental import IncrementalIndex
+from recommender.index_builder import write_index_files
+from recommender.metrics import stage, gauge_lines
+from recommender.similarity import profile_details
+from config.settings import (
+    INDEX_RELOAD_INTERVAL, INDEX_REFRESH_DELAY, INCREMENTAL_STATE_FILE, MMAP_INDEX_FILE,
+    SEARCH_BACKEND,
+)
 
-with open(INDEX_FILE, "rb") as f:
-    VECTORS, META, IDF = pickle.load(f)
+logger = logging.getLogger(__name__)
 
-def search(query: str):
+# The served snapshot. A reload builds a new SearchIndex and rebinds this
+# name in one step; a search reads it once and keeps using that snapshot.
+# Every snapshot is warmed before it is served, this first one included,
+# so no query pays for the lazy structures.
+INDEX = load_search_index()
+INDEX.warm()
+CACHE = ResultCache()
 
-    clean_q, k = parse_query(query)
+RELOAD = {"reloads": 0, "last_error": None, "last_reload": None}
+_reload_lock = threading.Lock()
+_watcher = None
+_watcher_stop = threading.Event()
 
-    tokens = preprocess(clean_q)
-    if not tokens:
-        return []
 
-    tf = compute_tf(tokens)
-    q_vec = compute_tfidf(tf, IDF)
+def analyze_query(query: str, index=None):
+    """
+    (tokens, k, corrections) of a query; corrections maps every misspelt
+    token to the vocabulary term that replaced it.
+    """
+    index = index or INDEX
+    with stage("parse_query"):
+        clean_q, k = parse_query(query)
+    with stage("preprocess"):
+        tokens = preprocess(clean_q)
+    with stage("correct"):
+        tokens, corrections = index.correct_tokens(tokens)
+    return tokens, k, corrections
+
+
+def query_tokens(query: str, index=None):
+    tokens, k, _ = analyze_query(query, index)
+    return tokens, k
+
 
-    results = []
+def query_vector(query: str, index=None):
+    """Parse the query and return (q_vec, k); q_vec is None when nothing is left."""
+    index = index or INDEX
+    tokens, k = query_tokens(query, index)
+    if not tokens:
+        return None, k
+
+    with stage("vectorize"):
+        return index.query_vector(tokens), k
 
-    for vec, row in zip(VECTORS, META):
-        score = cosine(q_vec, vec)
 
-        results.append({
+def format_results(ranked, index=None, details=False):
+    # details adds the profile fields the Streamlit UI shows
+    index = index or INDEX
+    top = []
+    for doc_id, score in ranked:
+        row = index.meta[doc_id]
+        result = {
             "name": row.get("name"),
             "faculty_id": row.get("faculty_id"),
             "score": round(score, 4)
-        })
+        }
+        if details:
+            result.update(profile_details(row))
+        top.append(result)
+    return top
 
-    results.sort(key=lambda x: x["score"], reverse=True)
 
-    top = results[:k]
+def scoring_key(backend=None, field_weights=None, alpha=None):
+    # cosine backends rank identically; bm25f depends on the field weights
+    # and hybrid on alpha
+    backend = backend or SEARCH_BACKEND
+    if backend == "bm25f":
+        return backend, tuple(sorted(field_weights.items())) if field_weights else None
+    if backend == "hybrid":
+        return backend, alpha
+    if backend == "lsa":
+        return backend
+    return "cosine"
 
-    for r in top:
-        print(r)
 
-    return top
+def select_candidates(index, search_filter):
+    # None means every document; ValueError for an unknown category
+    if not search_filter:
+        return None
+    return index.filters.select(search_filter)
+
+
+def search_corrected(query: str, backend=None, field_weights=None, search_filter=None, alpha=None, details=False):
+    """
+    (results, corrections) of a query: the results of search() and the
+    typo corrections applied to reach them, from one analyze_query().
+    """
+    index = INDEX
+
+    tokens, k, corrections = analyze_query(query, index)
+    if not tokens:
+        return [], corrections
+
+    key = (
+        cache_key(tokens, k), index.version, scoring_key(backend, field_weights, alpha),
+        search_filter.key() if search_filter else None, details,
+    )
+    with stage("cache"):
+        top = CACHE.get(key)
+    if top is not None:
+        return top, corrections
+
+    with stage("filter"):
+        candidates = select_candidates(index, search_filter)
+    if candidates is not None and not candidates:
+        top = []
+    else:
+        with stage("vectorize"):
+            q_vec = index.query_vector(tokens)
+        ranked = index.rank(q_vec, k, backend, field_weights, candidates, alpha)
+        with stage("format"):
+            top = format_results(ranked, index, details)
+    CACHE.put(key, top)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        for r in top:
+            logger.debug("hit %s", r)
+
+    return top, corrections
+
+
+def search(query: str, backend=None, field_weights=None, search_filter=None, alpha=None, details=False):
+    """
+    Top results of a query as {name, faculty_id, score}; with details, also
+    the profile fields of recommender.similarity.profile_details.
+    """
+    return search_corrected(query, backend, field_weights, search_filter, alpha, details)[0]
+
+
+def search_batch_corrected(queries, backend=None, field_weights=None, search_filter=None, alpha=None):
+    """
+    (results, corrections): one result list and one corrections dict per
+    query. Every query is analyzed once.
+    """
+    index = INDEX
+    analyzed = [analyze_query(q, index) for q in queries]
+    corrections = [c for _, _, c in analyzed]
+    with stage("filter"):
+        candidates = select_candidates(index, search_filter)
+    if candidates is not None and not candidates:
+        return [[] for _ in queries], corrections
+    with stage("vectorize"):
+        parsed = [(index.query_vector(tokens) if tokens else None, k) for tokens, k, _ in analyzed]
+    kept = [(q_vec, k) for q_vec, k in parsed if q_vec is not None]
+    ranked = iter(index.rank_batch(
+        [q for q, _ in kept], [k for _, k in kept], backend, field_weights, candidates, alpha,
+    ))
+
+    with stage("format"):
+        results = [
+            format_results(next(ranked), index) if q_vec is not None else []
+            for q_vec, _ in parsed
+        ]
+    return results, corrections
+
+
+def search_batch(queries, backend=None, field_weights=None, search_filter=None, alpha=None):
+    """
+    Score many queries in one sparse matrix-matrix product (one by one for
+    bm25f). Returns one result list per query, each honouring its own "top N".
+    search_filter applies to every query.
+    """
+    return search_batch_corrected(queries, backend, field_weights, search_filter, alpha)[0]
+
+
+def suggest(prefix: str, limit=10):
+    """Autocomplete: names, phrases and terms starting with prefix, by document frequency."""
+    return INDEX.suggester.suggest(prefix, limit)
+
+
+# ---------- Hot reload ----------
+
+def _load_and_swap(path):
+    global INDEX, _updates
+    try:
+        new = load_search_index(path)
+        new.warm()
+        INDEX = new
+        CACHE.invalidate()
+        with _updates_lock:
+            # a rebuilt file replaces any single-profile changes made before it
+            if _updates is not None and _updates.source_version != new.version:
+                _updates = None
+        RELOAD["reloads"] += 1
+        RELOAD["last_reload"] = time.time()
+        RELOAD["last_error"] = None
+        logger.info("Loaded index %s (%d documents)", path, len(new.meta))
+    except Exception as e:
+        RELOAD["last_error"] = f"{type(e).__name__}: {e}"
+        logger.exception("Index reload from %s failed", path)
+    finally:
+        _reload_lock.release()
+
+
+def reload_index(path=None, wait=False):
+    """
+    Load the index in a background thread and swap it in when it is ready.
+    Searches never wait for this. Returns False if a reload is already running.
+    """
+    if not _reload_lock.acquire(blocking=False):
+        return False
+
+    t = threading.Thread(
+        target=_load_and_swap, args=(path or active_index_file(),),
+        name="index-reload", daemon=True,
+    )
+    t.start()
+    if wait:
+        t.join()
+    return True
+
+
+def index_changed():
+    path = active_index_file()
+    return path != INDEX.path or index_file_version(path) != INDEX.version
+
+
+def _watch(interval):
+    while not _watcher_stop.wait(interval):
+        if index_changed():
+            reload_index()
+
+
+def start_watcher(interval=INDEX_RELOAD_INTERVAL):
+    global _watcher
+    if interval <= 0 or (_watcher is not None and _watcher.is_alive()):
+        return
+    _watcher_stop.clear()
+    _watcher = threading.Thread(target=_watch, args=(interval,), name="index-watcher", daemon=True)
+    _watcher.start()
+
+
+def stop_watcher():
+    _watcher_stop.set()
+
+
+def index_status():
+    index = INDEX
+    return {
+        "path": str(index.path),
+        "documents": len(index.meta),
+        "loaded_at": index.loaded_at,
+        "reloading": _reload_lock.locked(),
+        "pending_updates": pending_updates(),
+        **RELOAD,
+    }
+
+
+def metrics_gauges():
+    """Gauge lines for /metrics: size of the served index, cache and reloads."""
+    index = INDEX
+    version = index.version
+    cache = CACHE.stats()
+    return (
+        gauge_lines("recommender_index_documents", "Documents in the served index.", len(index.meta))
+        + gauge_lines("recommender_index_terms", "Terms in the vocabulary of the served index.", len(index.idf))
+        + gauge_lines("recommender_index_file_bytes", "Size of the served index file.", version[1] if version else 0)
+        + gauge_lines("recommender_index_reloads", "Index reloads since the process started.", RELOAD["reloads"])
+        + gauge_lines(
+            "recommender_cache", "Result cache statistics.",
+            {s: cache[s] for s in ("size", "maxsize", "hits", "misses", "hit_rate", "invalidations")}, "stat",
+        )
+    )
+
+
+# ---------- Single-profile updates ----------
+
+_updates = None
+_updates_lock = threading.Lock()
+_refresh_timer = None
+
+
+def _incremental():
+    # caller holds _updates_lock
+    global _updates
+    if _updates is None:
+        state = None
+        if INCREMENTAL_STATE_FILE.exists():
+            state = IncrementalIndex.load(INCREMENTAL_STATE_FILE)
+        if state is None or state.source_version != INDEX.version:
+            state = IncrementalIndex.from_search_index(INDEX)
+        _updates = state
+    return _updates
+
+
+def upsert_faculty(row):
+    """Add or replace one profile (by faculty_id); served after the next refresh."""
+    with _updates_lock:
+        _incremental().upsert(row)
+    _schedule_refresh()
+
+
+def delete_faculty(faculty_id):
+    with _updates_lock:
+        found = _incremental().delete(faculty_id)
+    if found:
+        _schedule_refresh()
+    return found
+
+
+def _schedule_refresh():
+    global _refresh_timer
+    with _updates_lock:
+        if _refresh_timer is None:
+            _refresh_timer = threading.Timer(INDEX_REFRESH_DELAY, refresh_index)
+            _refresh_timer.daemon = True
+            _refresh_timer.start()
+
+
+def refresh_index():
+    """
+    Recompute every weight from the stored TF and the current document
+    frequencies, rewrite the whole served index file, and swap the result in.
+    """
+    global INDEX, _refresh_timer
+    with _updates_lock:
+        _refresh_timer = None
+        if _updates is None:
+            return
+        new = _updates.to_search_index()
+
+        path = active_index_file()
+        write_index_files(
+            new.document_vectors(), new.meta, new.idf,
+            ("mmap",) if path == MMAP_INDEX_FILE else ("pickle",), new.fields,
+        )
+        new.path = path
+        new.version = index_file_version(path)
+        new.loaded_at = time.time()
+
+        _updates.source_version = new.version
+        _updates.save(INCREMENTAL_STATE_FILE)
+
+    new.warm()
+    INDEX = new
+    CACHE.invalidate()
+    logger.info("Refreshed index after single-profile updates (%d documents)", len(new.meta))
+
 
+def pending_updates():
+    return _refresh_timer is not None
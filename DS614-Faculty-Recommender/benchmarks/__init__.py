@@ -0,0 +1,7 @@
+"""
+Microbenchmarks of the recommender on synthetic corpora.
+
+    benchmarks.synthetic   faculty CSVs with the schema of the Finder's transformed_faculty_data.csv
+    benchmarks.run         times every stage, writes p50/p95/p99 and peak memory as JSON
+    benchmarks.compare     compares two result files, e.g. of two commits
+"""
@@ -0,0 +1,57 @@
+"""
+Compare two benchmark result files, e.g. of the commit before and after a change.
+
+    python -m benchmarks.compare before.json after.json --threshold 0.10
+
+Prints the change of p50 / p95 and peak memory for every (rows, stage) both
+files have, and exits with status 1 if any p50 or p95 got slower by more
+than the threshold (default 10%), so it can gate a CI job.
+"""
+import sys
+import argparse
+import json
+
+METRICS = ("p50_ms", "p95_ms", "peak_mb")
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    # stages that did not finish have no timings to compare
+    return report, {(r["rows"], r["stage"]): r for r in report["results"] if "error" not in r}
+
+
+def change(old, new):
+    return (new - old) / old if old else 0
+
+
+def compare(before, after, threshold=0.10):
+    """[(rows, stage, {metric: (old, new, relative change)}, regressed)] for the common entries."""
+    rows = []
+    for key in sorted(set(before) & set(after)):
+        diffs = {m: (before[key][m], after[key][m], change(before[key][m], after[key][m])) for m in METRICS}
+        regressed = any(diffs[m][2] > threshold for m in ("p50_ms", "p95_ms"))
+        rows.append((*key, diffs, regressed))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown (default 0.10)")
+    args = parser.parse_args()
+
+    (before_report, before), (after_report, after) = load(args.before), load(args.after)
+    print(f"before: {before_report.get('commit')}  after: {after_report.get('commit')}")
+    print(f"{'rows':>7} {'stage':<20} " + " ".join(f"{m:>26}" for m in METRICS))
+
+    regressions = 0
+    for n_rows, stage, diffs, regressed in compare(before, after, args.threshold):
+        cells = " ".join(f"{old:>10.3f} -> {new:>9.3f} {rel:>+4.0%}" for old, new, rel in diffs.values())
+        print(f"{n_rows:>7} {stage:<20} {cells}{'  REGRESSION' if regressed else ''}")
+        regressions += regressed
+
+    if regressions:
+        print(f"{regressions} stage(s) slower than the {args.threshold:.0%} threshold")
+        sys.exit(1)
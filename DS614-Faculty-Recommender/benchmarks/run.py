@@ -0,0 +1,266 @@
+"""
+Time every stage of the recommender on synthetic corpora.
+
+    python -m benchmarks.run --rows 100 10000 100000 --out results.json
+    python -m benchmarks.compare before.json results.json
+
+For every corpus size a synthetic CSV is generated (benchmarks.synthetic)
+and one child process times the stages against it. The child gets its own
+scratch INDEX_DIR, because app.engine loads the index when it is imported:
+
+    preprocess            preprocess() of one profile's text
+    compute_idf           compute_idf() of the whole tokenised corpus
+    build_index           build_index() from the CSV (pickle and mmap files)
+    load_pickle           load_search_index() of vectors.pkl
+    load_mmap             load_search_index() of index.bin
+    engine_search         engine.search(), result cache cleared
+
+Every stage reports p50/p95/p99/mean latency in ms over its calls, and
+peak_mb: how far the process's peak RSS rose above its RSS before the
+stage (Linux, where the peak can be reset through /proc/self/clear_refs).
+Elsewhere it is the peak of traced allocations during one extra call
+(tracemalloc), made after the timed ones so tracing never slows them.
+max_rss_mb is the child's peak RSS up to the end of the stage. The build runs first,
+before the corpus text and tokens are held for the other stages.
+"""
+import sys
+import os
+import argparse
+import gc
+import json
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = (
+    "preprocess", "compute_idf", "build_index", "load_pickle", "load_mmap",
+    "engine_search",
+)
+QUERIES = (
+    "machine learning", "wireless communication networks", "vlsi design", "computer vision",
+    "cryptography and security", "natural language processing", "signal processing",
+    "internet of things sensors", "quantum computing", "data mining top 10",
+)
+
+
+def summarize(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {
+        "calls": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "mean_ms": round(float(ms.mean()), 4),
+    }
+
+
+def proc_status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+
+
+def reset_peak_rss():
+    # Linux: restart the VmHWM high-water mark at the current RSS
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def traced_peak_mb(fn, *args):
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def bench(fn, calls):
+    """Time fn(*args) for every args tuple in calls and measure the peak memory they need."""
+    gc.collect()
+    rss_peak = reset_peak_rss()
+    before = proc_status_kb("VmRSS") if rss_peak else 0
+    seconds = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        seconds.append(time.perf_counter() - start)
+    if rss_peak:
+        peak = round((proc_status_kb("VmHWM") - before) / 1024, 2)
+    else:
+        peak = traced_peak_mb(fn, *calls[0])
+    return {**summarize(seconds), "peak_mb": peak}
+
+
+def run_stages(csv_path, samples, repeats, build_repeats, backend, seed=0):
+    """
+    Yield (stage, result) for every stage against csv_path as it finishes;
+    INDEX_DIR must already point at a scratch directory.
+    """
+    from recommender.preprocessing import preprocess
+    from recommender.vectorizer import compute_idf
+    from recommender.index_builder import build_index
+    from recommender.data_sources import iter_csv
+    from recommender.field_index import FIELDS
+    from recommender.search_index import load_search_index
+    from config.settings import INDEX_FILE, MMAP_INDEX_FILE
+
+    import pandas  # noqa: F401  (iter_csv imports it lazily; keep that out of the first build)
+
+    rng = random.Random(seed)
+
+    build = lambda: build_index(source="csv", path=csv_path)
+    yield "build_index", bench(build, [()] * build_repeats)
+
+    yield "load_pickle", bench(load_search_index, [(INDEX_FILE,)] * repeats)
+    yield "load_mmap", bench(load_search_index, [(MMAP_INDEX_FILE,)] * repeats)
+
+    texts = [" ".join(str(row.get(f, "")) for f in FIELDS) for row in iter_csv(csv_path)]
+    sample = rng.sample(texts, min(samples, len(texts)))
+    yield "preprocess", bench(preprocess, [(t,) for t in sample])
+
+    # one str object per distinct term, as a real corpus in memory would share them
+    tokens = [[sys.intern(w) for w in preprocess(t)] for t in texts]
+    yield "compute_idf", bench(compute_idf, [(tokens,)] * repeats)
+    del tokens
+
+    # queries: the fixed list plus pairs of words from the corpus
+    words = [w for t in rng.sample(texts, min(50, len(texts))) for w in preprocess(t)]
+    queries = list(QUERIES) + [f"{rng.choice(words)} {rng.choice(words)}" for _ in range(samples)]
+    queries = [(q,) for q in queries[:samples]]
+
+    from app import engine
+
+    def search(q):
+        engine.CACHE.clear()
+        return engine.search(q, backend)
+
+    yield "engine_search", bench(search, queries)
+
+
+def max_rss_mb():
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1)
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True,
+        ).stdout.strip()
+        return out + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(rows, args):
+    """
+    Generate a corpus of rows profiles and run the stages on it in a child
+    process. Stages the child did not finish (e.g. killed for running out of
+    memory) are reported with an error instead of timings.
+    """
+    from benchmarks.synthetic import write_csv
+
+    scratch = tempfile.mkdtemp(prefix=f"faculty-bench-{rows}-")
+    try:
+        csv_path = os.path.join(scratch, "faculty.csv")
+        index_dir = os.path.join(scratch, "index")
+        os.mkdir(index_dir)
+        start = time.perf_counter()
+        write_csv(csv_path, rows, args.seed)
+        print(f"[{rows} rows] generated in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        env = {**os.environ, "INDEX_DIR": index_dir, "INDEX_RELOAD_INTERVAL": "0"}
+        cmd = [
+            sys.executable, "-m", "benchmarks.run", "--child", csv_path,
+            "--samples", str(args.samples), "--repeats", str(args.repeats),
+            "--build-repeats", str(args.build_repeats), "--seed", str(args.seed),
+        ]
+        if args.backend:
+            cmd += ["--backend", args.backend]
+        proc = subprocess.run(cmd, cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+        done = {}
+        for line in proc.stdout.splitlines():
+            r = json.loads(line)
+            done[r["stage"]] = r
+        if proc.returncode:
+            print(f"[{rows} rows] benchmark process exited with {proc.returncode}", file=sys.stderr)
+        return [
+            {"rows": rows, **done[stage]} if stage in done else
+            {"rows": rows, "stage": stage, "error": f"not finished (exit status {proc.returncode})"}
+            for stage in STAGES
+        ]
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the recommender on synthetic corpora")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10000, 100000], help="corpus sizes")
+    parser.add_argument("--samples", type=int, default=200, help="calls of preprocess / engine.search")
+    parser.add_argument("--repeats", type=int, default=5, help="calls of compute_idf and loads")
+    parser.add_argument("--build-repeats", type=int, default=2, help="calls of build_index")
+    parser.add_argument("--backend", default=None, help="search backend (default: SEARCH_BACKEND)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="benchmark_results.json", help="JSON file to write")
+    parser.add_argument("--child", metavar="CSV", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # stdout carries one result line per stage; the code under test
+        # prints progress, which goes to stderr instead
+        real_stdout = sys.stdout
+        sys.stdout = sys.stderr
+        for stage, result in run_stages(
+            args.child, args.samples, args.repeats, args.build_repeats, args.backend, args.seed,
+        ):
+            print(json.dumps({"stage": stage, **result, "max_rss_mb": max_rss_mb()}), file=real_stdout, flush=True)
+        sys.exit()
+
+    from config.settings import SEARCH_BACKEND
+
+    results = []
+    for rows in args.rows:
+        results.extend(run_size(rows, args))
+
+    report = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "backend": args.backend or SEARCH_BACKEND,
+        "settings": {"samples": args.samples, "repeats": args.repeats, "build_repeats": args.build_repeats, "seed": args.seed},
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'rows':>7} {'stage':<20} {'calls':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'peak MiB':>9}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['rows']:>7} {r['stage']:<20} {r['error']}")
+            continue
+        print(f"{r['rows']:>7} {r['stage']:<20} {r['calls']:>5} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} "
+              f"{r['p99_ms']:>10.3f} {r['peak_mb']:>9}")
+    print(f"Wrote {args.out}")
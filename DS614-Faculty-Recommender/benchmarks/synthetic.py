@@ -0,0 +1,151 @@
+"""
+Synthetic faculty CSVs with the schema of the Finder's transformed_faculty_data.csv.
+
+Every field is modelled on the real CSV: its words are drawn from that
+field's word frequencies, its length from the lengths of the real values,
+and it is left empty as often as in the real data. The vocabulary grows
+with the square root of the number of rows (Heaps' law) through made-up
+words that each occur about once in the whole corpus, so larger corpora
+get the long tail of rare terms real ones have.
+
+    python -m benchmarks.synthetic --rows 10000 --out /tmp/faculty_10k.csv
+"""
+import argparse
+import csv
+import math
+import string
+from collections import Counter
+
+import numpy as np
+
+from config.settings import FACULTY_CSV_PATH
+
+COLUMNS = (
+    "faculty_id", "name", "phd_field", "mail", "bio", "specialization",
+    "research", "publications", "profile_url", "combined_text",
+)
+TEXT_FIELDS = ("bio", "specialization", "publications")
+
+# share of each category (profile URL path) in the real data
+CATEGORIES = {"faculty": 68, "adjunct-faculty": 27, "adjunct-faculty-international": 11, "distinguished-professor": 2}
+
+
+def letters(i):
+    # 0 -> "aaaa", 1 -> "aaab", ...: made-up words the tokenizer keeps whole
+    out = []
+    for _ in range(4):
+        i, r = divmod(i, 26)
+        out.append(string.ascii_lowercase[r])
+    return "zq" + "".join(reversed(out))
+
+
+class FieldModel:
+    """Word distribution, lengths and empty rate of one text field."""
+
+    def __init__(self, values):
+        words = Counter()
+        self.lengths = []
+        empty = 0
+        for v in values:
+            tokens = v.split()
+            if not tokens:
+                empty += 1
+                continue
+            words.update(tokens)
+            self.lengths.append(len(tokens))
+        self.words, self.counts = zip(*words.most_common()) if words else ((), ())
+        self.empty_rate = empty / len(values) if values else 0
+
+    def vocabulary(self, scale):
+        """
+        (words, probabilities) for a corpus scale times the real one: real
+        words with their real frequencies, plus made-up words weighted to
+        occur about once each.
+        """
+        scale = max(scale, 1)
+        extra = int(len(self.words) * (math.sqrt(scale) - 1))
+        words = np.array(list(self.words) + [letters(i) for i in range(extra)])
+        p = np.concatenate([np.asarray(self.counts, dtype=float), np.full(extra, 1 / scale)])
+        return words, p / p.sum()
+
+
+def sampler(words, p):
+    # draws by binary search in the cumulative distribution; rng.choice(p=...)
+    # would rebuild it on every call
+    cdf = np.cumsum(p)
+    cdf /= cdf[-1]
+    return lambda rng, n: words[np.searchsorted(cdf, rng.random(n), side="right")]
+
+
+class CorpusModel:
+    """Everything the generator takes from the real CSV."""
+
+    def __init__(self, path=FACULTY_CSV_PATH):
+        import pandas as pd
+
+        df = pd.read_csv(path).fillna("")
+        self.n_rows = len(df)
+        self.fields = {f: FieldModel(df[f].astype(str).tolist()) for f in TEXT_FIELDS}
+        names = [n.split() for n in df["name"] if n.split()]
+        self.first_names = sorted({n[0] for n in names})
+        self.last_names = sorted({n[-1] for n in names if len(n) > 1})
+        self.phd_fields = sorted({p for p in df["phd_field"] if p})
+
+
+def generate_rows(n_rows, seed=0, model=None):
+    """Yield n_rows synthetic faculty rows (dicts with COLUMNS)."""
+    model = model or CorpusModel()
+    rng = np.random.default_rng(seed)
+    scale = n_rows / model.n_rows
+    draw = {f: sampler(*m.vocabulary(scale)) for f, m in model.fields.items()}
+    categories = list(CATEGORIES)
+    cat_p = np.array(list(CATEGORIES.values()), dtype=float)
+    cat_p /= cat_p.sum()
+
+    def text(field):
+        m = model.fields[field]
+        if not m.lengths or rng.random() < m.empty_rate:
+            return ""
+        return " ".join(draw[field](rng, int(rng.choice(m.lengths))))
+
+    for i in range(n_rows):
+        first = model.first_names[rng.integers(len(model.first_names))]
+        last = model.last_names[rng.integers(len(model.last_names))]
+        name = f"{first} {last}"
+        slug = f"{first}-{last}-{i}".lower()
+        row = {
+            "faculty_id": f"SYN{i + 1:06d}",
+            "name": name,
+            "phd_field": model.phd_fields[rng.integers(len(model.phd_fields))],
+            "mail": f"{first}_{last}_{i}@dau.ac.in".lower(),
+            "bio": text("bio"),
+            "specialization": text("specialization"),
+            "research": "not_available",
+            "publications": text("publications"),
+            "profile_url": f"https://www.daiict.ac.in/{rng.choice(categories, p=cat_p)}/{slug}",
+        }
+        row["combined_text"] = " ".join(
+            row[f] for f in ("bio", "research", "specialization", "publications", "phd_field")
+        )
+        yield row
+
+
+def write_csv(path, n_rows, seed=0, model=None):
+    """Write a synthetic CSV of n_rows rows to path, streaming."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in generate_rows(n_rows, seed, model):
+            writer.writerow(row)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic faculty CSV")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="CSV file to write")
+    args = parser.parse_args()
+
+    write_csv(args.out, args.rows, args.seed)
+    print(f"Wrote {args.rows} rows to {args.out}")
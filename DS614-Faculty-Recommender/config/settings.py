@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -7,8 +8,118 @@ PHASE1_FACULTY_ENDPOINT = "/faculty"
 
 PHASE1_FACULTY_URL = PHASE1_API_BASE + PHASE1_FACULTY_ENDPOINT
 
+FINDER_ROOT = PROJECT_ROOT.parent / "DS614-Faculty-Finder"
+FACULTY_CSV_PATH = FINDER_ROOT / "data" / "cleaned" / "transformed_faculty_data.csv"
+FINDER_DB_PATH = FINDER_ROOT / "data" / "database" / "faculty.db"
+
+# Where build_index reads faculty rows from: "csv", "sqlite" or "api"
+INDEX_SOURCE = os.environ.get("INDEX_SOURCE", "csv")
+
 DATA_DIR = PROJECT_ROOT / "data"
-INDEX_DIR = PROJECT_ROOT / "index"
+# Directory of the index files; override to serve or benchmark another index
+INDEX_DIR = Path(os.environ.get("INDEX_DIR") or PROJECT_ROOT / "index")
 
 INDEX_FILE = INDEX_DIR / "vectors.pkl"
+MMAP_INDEX_FILE = INDEX_DIR / "index.bin"
+INCREMENTAL_STATE_FILE = INDEX_DIR / "incremental.pkl"
+FIELD_INDEX_FILE = INDEX_DIR / "fields.pkl"
+LSA_FILE = INDEX_DIR / "lsa.npz"
+LSA_DOCS_FILE = INDEX_DIR / "lsa_docs.npy"
 STOPWORDS_PATH = DATA_DIR / "stopwords.txt"
+
+# Optional file of extra phrases (one per line) that preprocessing merges
+# into single tokens, on top of preprocessing.PHRASES. Build and query must
+# use the same list, so rebuild the index after changing it.
+PHRASES_FILE = os.environ.get("PHRASES_FILE") or None
+
+# Scoring backend for search: "postings" (inverted index, pure Python),
+# "maxscore" (inverted index with MaxScore top-k pruning) or "sparse"
+# (CSR matrix, NumPy/SciPy). All of them return the same ranking.
+# "bm25f" ranks with BM25F over the per-field index instead of cosine,
+# "lsa" by cosine in LSA space and "hybrid" by a blend of LSA and TF-IDF.
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "postings")
+
+# Weight of each profile field, e.g. FIELD_WEIGHTS="name:4,research:3,bio:1".
+# The TF-IDF vectors count a term in a field this many times (rebuild the
+# index after changing it); bm25f applies the weights at query time.
+FIELD_WEIGHTS = {
+    field: float(weight)
+    for field, weight in (
+        part.split(":") for part in os.environ.get(
+            "FIELD_WEIGHTS", "name:4,research:3,specialization:2,publications:2,bio:1"
+        ).split(",")
+    )
+}
+
+# BM25F term-frequency saturation and length normalisation
+BM25_K1 = float(os.environ.get("BM25_K1", "1.2"))
+BM25_B = float(os.environ.get("BM25_B", "0.75"))
+
+# Dimensions of the LSA model fitted by a build with --lsa. "auto" takes
+# min(100, documents // 2): close to the number of documents the SVD keeps
+# nearly everything, and "lsa" ranks like lexical cosine. No size helps on
+# the bundled 108 profiles (scripts/lsa_report.py); check it on larger data.
+LSA_COMPONENTS = os.environ.get("LSA_COMPONENTS", "auto")
+
+# Share of the TF-IDF cosine in the hybrid score; the rest is the LSA cosine
+HYBRID_ALPHA = float(os.environ.get("HYBRID_ALPHA", "0.5"))
+
+# In-process result cache in front of engine.search.
+# Entries expire after RESULT_CACHE_TTL seconds; a size of 0 disables it.
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL = 600
+
+# Index file served by the engine: "pickle" (INDEX_FILE), "mmap"
+# (MMAP_INDEX_FILE) or "auto" (the newer of the two that exist).
+INDEX_FORMAT = os.environ.get("INDEX_FORMAT", "auto")
+
+# Seconds between checks of the index file by the API; a changed file is
+# loaded in the background and swapped in. 0 disables the watcher.
+INDEX_RELOAD_INTERVAL = float(os.environ.get("INDEX_RELOAD_INTERVAL", "5"))
+
+# Seconds to wait after a single-profile upsert/delete before the weights
+# are recomputed and the new index is written and served, so a burst of
+# changes costs one refresh.
+INDEX_REFRESH_DELAY = float(os.environ.get("INDEX_REFRESH_DELAY", "2"))
+
+# Bearer token of the routes that change what is served (POST /admin/reload,
+# PUT and DELETE /admin/faculty/{id}). Without it those routes do not
+# exist: anyone who can reach the API could otherwise rewrite profiles.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN") or None
+
+# Per-stage latency histograms on /metrics and a Server-Timing header on
+# every API response. METRICS_ENABLED=0 turns the timers into no-ops.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1").lower() not in ("0", "false", "no", "")
+
+# On-demand profiling of API requests: a PROFILE_SAMPLE_RATE share of the
+# requests (0 = none; changeable at runtime through PUT /admin/profiling)
+# and every request with the PROFILE_HEADER header run under cProfile.
+# The last PROFILE_BUFFER_SIZE profiles are served from /admin/profiles.
+# Off by default: the header and the /admin/profil* routes are open to any
+# client, so only set PROFILING_ENABLED=1 on a server you are debugging.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0").lower() not in ("0", "false", "no", "")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_HEADER = os.environ.get("PROFILE_HEADER", "X-Debug-Profile")
+PROFILE_BUFFER_SIZE = int(os.environ.get("PROFILE_BUFFER_SIZE", "20"))
+
+# Query tokens missing from the vocabulary are replaced by the closest term
+# within this many edits (recommender/spelling.py); 0 disables correction.
+SPELL_MAX_DISTANCE = int(os.environ.get("SPELL_MAX_DISTANCE", "2"))
+# Words the corpus may lack but users type on purpose ("drones", "rust"),
+# one per line; they are searched as typed, never corrected.
+SPELL_WORDS_FILE = os.environ.get("SPELL_WORDS_FILE") or None
+
+# Porter-stem every token (recommender/stemming.py), so "networks" and
+# "networking" index and match as "network". Build and query must agree:
+# rebuild the index after changing it. Stems are memoized for up to
+# STEM_CACHE_SIZE distinct words.
+STEMMING = os.environ.get("STEMMING", "0").lower() not in ("0", "false", "no", "")
+STEM_CACHE_SIZE = int(os.environ.get("STEM_CACHE_SIZE", "100000"))
+
+# Faculty photo thumbnails for the Streamlit UI (recommender/thumbnails.py),
+# downloaded ahead of time by scripts/prefetch_photos.py, or in the
+# background when the UI starts unless THUMBNAIL_PREFETCH=0. Photos are
+# scaled to at most THUMBNAIL_SIZE pixels a side when Pillow is installed.
+THUMBNAIL_DIR = Path(os.environ.get("THUMBNAIL_DIR") or DATA_DIR / "thumbnails")
+THUMBNAIL_SIZE = int(os.environ.get("THUMBNAIL_SIZE", "200"))
+THUMBNAIL_PREFETCH = os.environ.get("THUMBNAIL_PREFETCH", "1").lower() not in ("0", "false", "no", "")
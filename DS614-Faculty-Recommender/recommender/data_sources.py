@@ -0,0 +1,131 @@
+"""
+Streaming sources of faculty rows for the index builder.
+
+Every source is a generator of row dicts (faculty_id, name, research,
+specialization, publications, bio, ...), so a build only holds the rows it
+is currently working on, whichever store it reads from:
+
+- "csv":    the Finder's cleaned CSV, read in chunks
+- "sqlite": the Finder's faculty.db, read from a cursor in batches
+- "api":    the Finder's /faculty endpoint, paged with limit/offset
+
+Every source must provide REQUIRED_COLUMNS. profile_url drives the
+category filter and the UI's profile links, so a source without it fails
+the build instead of producing an index where both silently break.
+photo_url is optional (crawls before the spider stored it have none).
+"""
+import sqlite3
+
+from config.settings import FACULTY_CSV_PATH, FINDER_DB_PATH, PHASE1_FACULTY_URL
+
+FACULTY_COLUMNS = (
+    "faculty_id", "name", "mail", "phd_field",
+    "specialization", "bio", "research", "publications", "profile_url",
+)
+REQUIRED_COLUMNS = ("faculty_id", "name", "profile_url")
+OPTIONAL_COLUMNS = ("photo_url",)
+
+
+def check_columns(columns, source):
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(
+            f"{source} has no {', '.join(missing)} column(s); rebuild it with the current "
+            f"Finder pipeline (required: {', '.join(REQUIRED_COLUMNS)})"
+        )
+
+
+def iter_csv(path=FACULTY_CSV_PATH, chunk_size=1000):
+    import pandas as pd
+
+    print(f"Reading from {path}")
+    for df in pd.read_csv(path, chunksize=chunk_size):
+        check_columns(df.columns, path)
+        # Fill NaNs to avoid issues
+        yield from df.fillna("").to_dict("records")
+
+
+def iter_sqlite(path=FINDER_DB_PATH, batch_size=500):
+    print(f"Reading from {path}")
+    # read-only, so a build never locks the Finder's database for writing
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(faculty)")}
+        check_columns(existing, path)
+        columns = FACULTY_COLUMNS + tuple(c for c in OPTIONAL_COLUMNS if c in existing)
+        cursor = conn.execute(
+            f"SELECT {', '.join(columns)} FROM faculty ORDER BY faculty_id"
+        )
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            for values in batch:
+                yield {col: "" if v is None else v for col, v in zip(columns, values)}
+    finally:
+        conn.close()
+
+
+def make_session(retries=3, pool_size=4):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=pool_size,
+        max_retries=Retry(total=retries, backoff_factor=0.5, status_forcelist=(502, 503, 504)),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def iter_api(url=PHASE1_FACULTY_URL, page_size=200, session=None, timeout=30):
+    """Page through the Finder API over one keep-alive session."""
+    print(f"Reading from {url}")
+    own_session = session is None
+    session = session or make_session()
+    try:
+        offset = 0
+        while True:
+            response = session.get(url, params={"limit": page_size, "offset": offset}, timeout=timeout)
+            response.raise_for_status()
+            rows = response.json()["results"]
+            if rows and offset == 0:
+                check_columns(rows[0], url)
+            for row in rows:
+                yield {k: "" if v is None else v for k, v in row.items()}
+            if len(rows) < page_size:
+                break
+            offset += len(rows)
+    finally:
+        if own_session:
+            session.close()
+
+
+SOURCES = {
+    "csv": iter_csv,
+    "sqlite": iter_sqlite,
+    "api": iter_api,
+}
+
+
+def iter_rows(source="csv", **kwargs):
+    """Rows from the named source; kwargs go to the source (path, url, ...)."""
+    try:
+        reader = SOURCES[source]
+    except KeyError:
+        raise ValueError(f"Unknown data source: {source} (expected one of {', '.join(SOURCES)})")
+    return reader(**kwargs)
+
+
+def iter_chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
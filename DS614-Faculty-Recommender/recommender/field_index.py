@@ -0,0 +1,197 @@
+"""
+Per-field index of faculty profiles and BM25F ranking over it.
+
+Each profile field (name, research, ...) is tokenised once and indexed on
+its own: term -> (doc ids, counts) postings and a token length per document,
+for every field. Field weights are only applied when a query is scored, so
+they can be tuned without rebuilding anything.
+
+BM25F (Zaragoza et al.): the length-normalised counts of a term in each
+field are combined into one weighted pseudo-frequency per document,
+
+    tf(d, t) = sum_f  w_f * count_f(d, t) / ((1 - b) + b * len_f(d) / avglen_f)
+
+which is saturated once, score(d) = sum_t idf(t) * tf*(k1 + 1) / (tf + k1).
+"""
+import math
+import os
+import pickle
+from array import array
+from collections import Counter
+
+from recommender.preprocessing import preprocess
+from recommender.inverted_index import top_k, pack_postings, unpack_postings
+from config.settings import FIELD_WEIGHTS, BM25_K1, BM25_B
+
+FIELDS = ("name", "research", "specialization", "publications", "bio")
+
+# what the index keeps of each profile: the fields results and filters
+# show or select on (engine.format_results, similarity.profile_details,
+# filters.FilterIndex). The profile text is only kept as term counts.
+META_FIELDS = (
+    "faculty_id", "name", "mail", "phd_field", "specialization", "research",
+    "publications", "pub_links", "profile_url", "photo_url",
+)
+
+
+def meta_row(row, fields=META_FIELDS):
+    """The metadata row kept for a profile: row without bio and other columns."""
+    return {f: row[f] for f in fields if f in row}
+
+
+def field_counts(row, fields=FIELDS):
+    """{field: {term: count}} of one profile, each field tokenised once."""
+    counts = {}
+    for field in fields:
+        value = row.get(field)
+        counts[field] = Counter(preprocess("" if value is None else str(value)))
+    return counts
+
+
+def weighted_tf(counts, weights=FIELD_WEIGHTS):
+    """
+    TF of a whole profile where a term in field f counts weights[f] times,
+    i.e. the TF of the profile text with every field repeated that often.
+    """
+    tf = {}
+    total = 0
+    for field, c in counts.items():
+        w = weights.get(field, 0)
+        if not w:
+            continue
+        for term, n in c.items():
+            tf[term] = tf.get(term, 0) + w*n
+            total += w*n
+    return {term: x/total for term, x in tf.items()} if total else {}
+
+
+def parse_weights(text, fields=FIELDS):
+    """ "name:4,research:3" -> {"name": 4.0, "research": 3.0}; ValueError if malformed."""
+    weights = {}
+    for part in text.split(","):
+        field, sep, weight = part.partition(":")
+        if not sep:
+            raise ValueError(f"Expected field:weight, got {part!r}")
+        weights[field.strip()] = float(weight)
+    check_weights(weights, fields)
+    return weights
+
+
+def check_weights(weights, fields=FIELDS):
+    unknown = set(weights) - set(fields)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))} (expected {', '.join(fields)})")
+    if any(w < 0 for w in weights.values()):
+        raise ValueError("Field weights must not be negative")
+
+
+class FieldIndex:
+    """Per-field postings and lengths, built one document at a time with add()."""
+
+    def __init__(self, fields=FIELDS):
+        self.fields = tuple(fields)
+        self.postings = {f: {} for f in self.fields}     # field -> term -> (doc ids, counts)
+        self.lengths = {f: array("I") for f in self.fields}
+        self.df = {}
+        self.n_docs = 0
+        self._norms = {}
+
+    @classmethod
+    def from_counts(cls, docs, fields=FIELDS):
+        index = cls(fields)
+        for counts in docs:
+            index.add(counts)
+        return index
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            fields, postings, lengths, df, n_docs = pickle.load(f)
+        index = cls(fields)
+        index.postings = {f: unpack_postings(packed) for f, packed in postings.items()}
+        index.lengths, index.df, index.n_docs = lengths, df, n_docs
+        return index
+
+    def save(self, path):
+        postings = {f: pack_postings(p) for f, p in self.postings.items()}
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((self.fields, postings, self.lengths, self.df, self.n_docs), f)
+        os.replace(tmp, path)
+
+    def add(self, counts):
+        """Append one document given as {field: {term: count}}; returns its doc id."""
+        doc_id = self.n_docs
+        terms = set()
+        for field in self.fields:
+            c = counts.get(field, {})
+            self.lengths[field].append(sum(c.values()))
+            postings = self.postings[field]
+            for term, n in c.items():
+                plist = postings.get(term)
+                if plist is None:
+                    plist = postings[term] = (array("I"), array("I"))
+                plist[0].append(doc_id)
+                plist[1].append(n)
+            terms.update(c)
+        for term in terms:
+            self.df[term] = self.df.get(term, 0) + 1
+        self.n_docs += 1
+        self._norms.clear()
+        return doc_id
+
+    def document_counts(self):
+        """{field: {term: count}} of every document, rebuilt from the postings."""
+        docs = [{f: {} for f in self.fields} for _ in range(self.n_docs)]
+        for field, postings in self.postings.items():
+            for term, (ids, counts) in postings.items():
+                for doc_id, n in zip(ids, counts):
+                    docs[doc_id][field][term] = n
+        return docs
+
+    def idf(self, term):
+        df = self.df.get(term, 0)
+        if not df:
+            return 0
+        return math.log(1 + (self.n_docs - df + 0.5)/(df + 0.5))
+
+    def length_norms(self, field, b=BM25_B):
+        # 1 / ((1 - b) + b * len / avglen) per document, cached per (field, b)
+        key = field, b
+        norms = self._norms.get(key)
+        if norms is None:
+            lengths = self.lengths[field]
+            avg = sum(lengths)/len(lengths) if lengths else 0
+            norms = [1/((1 - b) + b*n/avg) if avg else 1 for n in lengths]
+            self._norms[key] = norms
+        return norms
+
+    def scores(self, terms, weights=None, k1=BM25_K1, b=BM25_B, allowed=None):
+        """
+        {doc_id: BM25F score} of every document containing a query term
+        (and with allowed[doc_id] == 1, when an allowed mask is given).
+        """
+        weights = FIELD_WEIGHTS if weights is None else weights
+        check_weights(weights, self.fields)
+
+        acc = {}
+        for term in set(terms):
+            idf = self.idf(term)
+            if not idf:
+                continue
+            tf = {}
+            for field, w in weights.items():
+                plist = self.postings[field].get(term)
+                if not w or plist is None:
+                    continue
+                norms = self.length_norms(field, b)
+                for doc_id, n in zip(*plist):
+                    if allowed is None or allowed[doc_id]:
+                        tf[doc_id] = tf.get(doc_id, 0) + w*n*norms[doc_id]
+            for doc_id, x in tf.items():
+                acc[doc_id] = acc.get(doc_id, 0) + idf*x*(k1 + 1)/(x + k1)
+        return acc
+
+    def rank(self, terms, k, weights=None, k1=BM25_K1, b=BM25_B, allowed=None):
+        """Best k documents for the query terms as [(doc_id, score), ...]."""
+        return top_k(self.scores(terms, weights, k1, b, allowed), k)
@@ -0,0 +1,161 @@
+"""
+Metadata filters and required / excluded terms, as bitsets over documents.
+
+A bitset is a Python int with bit d set when document d matches, so
+combining any number of filters is a few big-int AND / OR / NOT operations
+(machine words at a time) however many documents there are. The bitsets
+for faculty categories and PhD-field words are built once per index; the
+bitset of a search term comes straight from its postings. The combined
+set is handed to the scorer as a mask, so documents it rules out are never
+scored.
+"""
+from urllib.parse import urlparse
+
+import numpy as np
+
+from recommender.preprocessing import preprocess
+
+
+def faculty_category(row):
+    # https://www.daiict.ac.in/adjunct-faculty/some-name -> "adjunct-faculty"
+    parts = [p for p in urlparse(row.get("profile_url") or "").path.split("/") if p]
+    return parts[-2] if len(parts) >= 2 else ""
+
+
+def bits_from_ids(ids, n_docs):
+    mask = np.zeros(n_docs, dtype=bool)
+    mask[np.asarray(ids, dtype=np.int64)] = True
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+def mask_from_bits(bits, n_docs):
+    raw = np.frombuffer(bits.to_bytes((n_docs + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little", count=n_docs).astype(bool)
+
+
+def split_values(text):
+    # "a, b ,c" -> ("a", "b", "c")
+    return tuple(v.strip() for v in (text or "").split(",") if v.strip())
+
+
+class SearchFilter:
+    """
+    What a document must satisfy to be ranked. Every part is optional:
+
+    phd_field   keywords; the PhD field must contain one of them (all words of it)
+    category    faculty categories from the profile URL, e.g. "adjunct-faculty"; one must match
+    must        terms the profile must contain (all words of each)
+    exclude     terms the profile must not contain
+    """
+
+    def __init__(self, phd_field=(), category=(), must=(), exclude=()):
+        self.phd_field = tuple(phd_field)
+        self.category = tuple(category)
+        self.must = tuple(must)
+        self.exclude = tuple(exclude)
+
+    def __bool__(self):
+        return bool(self.phd_field or self.category or self.must or self.exclude)
+
+    def key(self):
+        # hashable and order independent, for the result cache
+        return tuple(tuple(sorted(set(part))) for part in (self.phd_field, self.category, self.must, self.exclude))
+
+
+class Candidates:
+    """Documents left after filtering, as a bitset with lazily derived masks."""
+
+    def __init__(self, bits, n_docs):
+        self.bits = bits
+        self.n_docs = n_docs
+        self._mask = None
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    @property
+    def mask(self):
+        # NumPy bool array, one entry per document
+        if self._mask is None:
+            self._mask = mask_from_bits(self.bits, self.n_docs)
+        return self._mask
+
+    @property
+    def allowed(self):
+        # bytes with allowed[d] == 1 for candidates: the cheapest lookup in a Python loop
+        return self.mask.view(np.uint8).tobytes()
+
+    @property
+    def ids(self):
+        return np.flatnonzero(self.mask)
+
+
+class FilterIndex:
+    """Per-value bitsets for the metadata filters of one index snapshot."""
+
+    def __init__(self, meta, postings):
+        self.n_docs = len(meta)
+        self.all = (1 << self.n_docs) - 1
+        self.postings = postings
+
+        categories = {}
+        phd_words = {}
+        for doc_id, row in enumerate(meta):
+            categories.setdefault(faculty_category(row), []).append(doc_id)
+            for w in set(preprocess(str(row.get("phd_field") or ""))):
+                phd_words.setdefault(w, []).append(doc_id)
+        self.categories = {c: bits_from_ids(ids, self.n_docs) for c, ids in categories.items()}
+        self.phd_words = {w: bits_from_ids(ids, self.n_docs) for w, ids in phd_words.items()}
+
+    def term_bits(self, term):
+        plist = self.postings.get(term)
+        if plist is None:
+            return 0
+        return bits_from_ids(plist[0], self.n_docs)
+
+    def _all_words(self, text, lookup):
+        # documents having every word of text; None if text has no indexable word
+        words = preprocess(text)
+        if not words:
+            return None
+        bits = self.all
+        for w in words:
+            bits &= lookup(w)
+        return bits
+
+    def select(self, search_filter):
+        """Candidates matching search_filter; ValueError for an unknown category."""
+        bits = self.all
+
+        if search_filter.category:
+            unknown = set(search_filter.category) - set(self.categories)
+            if unknown:
+                raise ValueError(
+                    f"Unknown category: {', '.join(sorted(unknown))} "
+                    f"(expected one of {', '.join(sorted(c for c in self.categories if c))})"
+                )
+            any_of = 0
+            for c in search_filter.category:
+                any_of |= self.categories[c]
+            bits &= any_of
+
+        if search_filter.phd_field:
+            any_of = None
+            for keyword in search_filter.phd_field:
+                match = self._all_words(keyword, lambda w: self.phd_words.get(w, 0))
+                if match is not None:
+                    any_of = match if any_of is None else any_of | match
+            if any_of is not None:
+                bits &= any_of
+
+        for term in search_filter.must:
+            match = self._all_words(term, self.term_bits)
+            if match is not None:
+                bits &= match
+
+        for term in search_filter.exclude:
+            match = self._all_words(term, self.term_bits)
+            if match is not None:
+                bits &= ~match
+
+        return Candidates(bits, self.n_docs)
@@ -0,0 +1,118 @@
+import os
+import pickle
+
+from recommender.vectorizer import compute_tfidf, idf_from_df
+from recommender.field_index import FieldIndex, field_counts, weighted_tf, meta_row
+from recommender.search_index import SearchIndex
+
+# bumped when the pickled state changes shape; older state files are ignored
+STATE_VERSION = 2
+
+
+class IncrementalIndex:
+    """
+    Index state that can change one faculty profile at a time.
+
+    Each document keeps its per-field term counts, and the per-term document
+    frequencies are kept up to date, so an upsert or delete only tokenises
+    the profile being changed. TF-IDF weights depend on the IDF of the whole
+    corpus; they are recomputed from the stored counts in to_search_index(),
+    which the engine runs on a short schedule after a batch of changes
+    rather than on every change.
+    """
+
+    def __init__(self):
+        self.docs = {}          # faculty_id -> ({field: {term: count}}, meta row), in index order
+        self.df = {}
+        self.source_version = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        state = cls()
+        for row in rows:
+            state.upsert(row)
+        return state
+
+    @classmethod
+    def from_search_index(cls, index):
+        """Recover the per-field counts of a built index from its field index, without re-tokenising."""
+        state = cls()
+        for counts, row in zip(index.fields.document_counts(), index.meta):
+            state._add(row_id(row), counts, row)
+        state.source_version = index.version
+        return state
+
+    @classmethod
+    def load(cls, path):
+        """Saved state, or None if it was written in an older format."""
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if data[0] != STATE_VERSION:
+            return None
+        state = cls()
+        _, state.docs, state.df, state.source_version = data
+        return state
+
+    def save(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((STATE_VERSION, self.docs, self.df, self.source_version), f)
+        os.replace(tmp, path)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, faculty_id):
+        return faculty_id in self.docs
+
+    def _count(self, counts, delta):
+        # the terms of the weighted TF, exactly what a full build counts
+        for w in weighted_tf(counts):
+            n = self.df.get(w, 0) + delta
+            if n:
+                self.df[w] = n
+            else:
+                del self.df[w]
+
+    def _add(self, faculty_id, counts, row):
+        self.docs[faculty_id] = (counts, row)
+        self._count(counts, 1)
+
+    def upsert(self, row):
+        """Add or replace the profile with row["faculty_id"]; an update keeps its position."""
+        faculty_id = row_id(row)
+        if not faculty_id:
+            raise ValueError("faculty_id is required")
+
+        counts = field_counts(row)
+
+        if faculty_id in self.docs:
+            self._count(self.docs[faculty_id][0], -1)
+        self._add(faculty_id, counts, meta_row(row))
+
+    def delete(self, faculty_id):
+        """Remove a profile; returns False if it was not in the index."""
+        if faculty_id not in self.docs:
+            return False
+        counts, _ = self.docs.pop(faculty_id)
+        self._count(counts, -1)
+        return True
+
+    def idf(self):
+        return idf_from_df(self.df, len(self.docs))
+
+    def to_search_index(self):
+        """Fresh SearchIndex with every weight recomputed against the current IDF."""
+        idf = self.idf()
+        vectors = []
+        meta = []
+        for counts, row in self.docs.values():
+            vectors.append(compute_tfidf(weighted_tf(counts), idf))
+            meta.append(row)
+        fields = FieldIndex.from_counts(counts for counts, _ in self.docs.values())
+        return SearchIndex(vectors, meta, idf, fields=fields)
+
+
+def row_id(row):
+    faculty_id = row.get("faculty_id")
+    return str(faculty_id) if faculty_id not in (None, "") else None
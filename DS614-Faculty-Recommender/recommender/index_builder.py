@@ -1,72 +1,192 @@
-import requests
+import os
+import sys
+import time
 import pickle
-from pathlib import Path
-
-from recommender.preprocessing import preprocess
-from recommender.vectorizer import compute_tf, compute_idf, compute_tfidf
-
-from config.settings import PHASE1_FACULTY_URL, INDEX_FILE
-
-PHASE1_URL = "http://localhost:8000/faculty"
-
-def fetch_data():
-
-    from config.settings import PROJECT_ROOT
-    csv_path = PROJECT_ROOT.parent / "DS614-Faculty-Finder" / "data" / "cleaned" / "transformed_faculty_data.csv"
-    
-    print(f"Reading from {csv_path}")
-    import pandas as pd
-    
-    # Read CSV and treat specific columns as lists if generic parser fails, though preprocessing usually handles it.
-    # We simply convert the dataframe to a list of dicts to match the previous API response format.
-    df = pd.read_csv(csv_path)
-    
-    # Fill NaNs to avoid issues
-    df = df.fillna("")
-    
-    return df.to_dict("records")
-
-def safe(x):
-    if x is None:
-        return ""
-    return str(x)
-
-def build_docs(row):
-    return (
-        safe(row.get("name")) * 4 + " " +
-        safe(row.get("research")) * 3 + " " +
-        safe(row.get("specialization")) * 2 + " " +
-        safe(row.get("publications")) * 2 + " " +
-        safe(row.get("bio"))
-    )
-
-
-def build_index():
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from recommender.vectorizer import compute_tfidf, idf_from_df
+from recommender.inverted_index import build_postings, compute_norms, pack_postings
+from recommender.index_format import write_index
+from recommender.term_vectors import Vocabulary, TermVector
+from recommender.data_sources import iter_rows, iter_chunks
+from recommender.field_index import FieldIndex, field_counts, weighted_tf, meta_row
+from recommender.semantic import LsaModel
+from recommender import sparse_backend
+
+from config.settings import INDEX_FILE, MMAP_INDEX_FILE, FIELD_INDEX_FILE, LSA_FILE, INDEX_SOURCE
+
+def fetch_data(source=None, **source_options):
+    # whole dataset as a list of dicts; build_index itself streams the rows
+    return list(iter_rows(source or INDEX_SOURCE, **source_options))
+
+def write_lsa(vectors, idf, n_components=0):
+    """
+    Fit an LSA model with n_components dimensions (or "auto") on the
+    TF-IDF matrix, or with n_components=0 fold the documents into the
+    existing model (if any), so its document embeddings always match the
+    index.
+    """
+    if not n_components and not LSA_FILE.exists():
+        return None
+    vocab, matrix = sparse_backend.build_matrix(vectors, Vocabulary(idf).ids)
+    if n_components:
+        model = LsaModel.fit(matrix, vocab, n_components)
+    else:
+        model = LsaModel.load()
+        model.docs = model.embed_matrix(matrix, vocab)
+    model.save()
+    return model
+
+
+def write_index_files(vectors, meta, idf, formats=("pickle", "mmap"), fields=None, lsa_components=0):
+    # the field index and LSA model go first: a reload triggered by the main
+    # file then finds the matching ones
+    if fields is not None:
+        fields.save(FIELD_INDEX_FILE)
+    write_lsa(vectors, idf, lsa_components)
+
+    if "pickle" in formats:
+        postings = build_postings(vectors)
+        norms = compute_norms(vectors)
+        # documents are stored compact; term ids follow sorted(idf), so the
+        # loader rebuilds the same Vocabulary from idf
+        vocab = Vocabulary(idf)
+        compact = [TermVector.from_dict(v, vocab) for v in vectors]
+
+        # write aside and rename, so a running engine never reads half a file
+        tmp = f"{INDEX_FILE}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((compact, meta, idf, pack_postings(postings), norms), f)
+        os.replace(tmp, INDEX_FILE)
+
+    if "mmap" in formats:
+        write_index(MMAP_INDEX_FILE, vectors, meta, idf)
+
+
+def finish_index(tfs, meta, df, formats, fields, lsa_components=0):
+    # weights need the IDF of the whole corpus, so they come last
+    idf = idf_from_df(df, len(tfs))
+    vectors = [compute_tfidf(tf, idf) for tf in tfs]
+    write_index_files(vectors, meta, idf, formats, fields, lsa_components)
+    return vectors, idf
+
+
+def build_index(formats=("pickle", "mmap"), source=None, lsa_components=0, **source_options):
+    """
+    Build the index from a data source ("csv", "sqlite" or "api", default
+    INDEX_SOURCE). Rows are streamed: each field of a row is tokenised once
+    into the per-field index, and the TF-IDF vectors use the field-weighted
+    counts (FIELD_WEIGHTS), so no profile text is repeated; of each row
+    only the result fields (field_index.META_FIELDS) are kept, not its bio.
+    lsa_components > 0 (or "auto") also fits an LSA model of that many dimensions.
+    """
+    tfs = []
+    meta = []
+    df = {}
+    fields = FieldIndex()
 
-    data = fetch_data()
+    for row in iter_rows(source or INDEX_SOURCE, **source_options):
+        counts = field_counts(row)
+        fields.add(counts)
+        tf = weighted_tf(counts)
+        tfs.append(tf)
+        meta.append(meta_row(row))
+        for w in tf:
+            df[w] = df.get(w, 0) + 1
 
-    docs = []
-    meta = []
+    finish_index(tfs, meta, df, formats, fields, lsa_components)
 
-    for row in data:
-        text = build_docs(row)
-        tokens = preprocess(text)
-        docs.append(tokens) #corpus
-        meta.append(row)
-        print(row.keys()) 
+    print("Index built successfully")
 
-    idf = compute_idf(docs)
 
-    vectors = []
+# ---------- Parallel, streaming build ----------
+
+def tokenize_chunk(rows):
+    """Worker: per-field counts and TF of every row in the chunk, plus the chunk's document frequencies."""
+    counts = []
+    tfs = []
+    df = {}
+    for row in rows:
+        c = field_counts(row)
+        tf = weighted_tf(c)
+        counts.append(c)
+        tfs.append(tf)
+        for w in tf:
+            df[w] = df.get(w, 0) + 1
+    return counts, tfs, df
+
+
+def peak_rss_mb():
+    """Peak RSS in MiB of this process and of its finished child processes."""
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None, None
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss: bytes on macOS, KiB on Linux
+    return tuple(
+        round(resource.getrusage(who).ru_maxrss / unit, 1)
+        for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)
+    )
 
-    for tokens in docs:
-        tf = compute_tf(tokens)
-        vec = compute_tfidf(tf, idf)
-        vectors.append(vec)
-        
 
-    with open(INDEX_FILE, "wb") as f:
-        pickle.dump((vectors, meta, idf), f)
+def build_index_parallel(chunk_size=1000, workers=None, formats=("pickle", "mmap"), source=None,
+                         lsa_components=0, **source_options):
+    """
+    Build the same index as build_index, streaming the source in chunks.
 
+    Chunks are tokenised in a process pool (map step) while the parent merges
+    the per-chunk document frequencies (reduce step). Only a bounded number
+    of raw chunks is in flight; the parent keeps the compact TF dicts and
+    the trimmed metadata rows (meta_row), never the profile text or the
+    token lists. Weights are
+    computed once the global IDF is known. Returns a summary of the build.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
 
+    tfs = []
+    meta = []
+    df = {}
+    fields = FieldIndex()
+
+    def merge(future):
+        chunk_counts, chunk_tfs, chunk_df = future.result()
+        for c in chunk_counts:
+            fields.add(c)
+        tfs.extend(chunk_tfs)
+        for w, n in chunk_df.items():
+            df[w] = df.get(w, 0) + n
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        rows_in = iter_rows(source or INDEX_SOURCE, **source_options)
+        for rows in iter_chunks(rows_in, chunk_size):
+            meta.extend(meta_row(row) for row in rows)
+            in_flight.append(pool.submit(tokenize_chunk, rows))
+            # results are merged in submission order so doc ids match the CSV
+            while len(in_flight) > 2 * workers:
+                merge(in_flight.popleft())
+        while in_flight:
+            merge(in_flight.popleft())
+    tokenized = time.perf_counter()
+
+    vectors, idf = finish_index(tfs, meta, df, formats, fields, lsa_components)
+    finished = time.perf_counter()
+
+    rss, worker_rss = peak_rss_mb()
+    summary = {
+        "documents": len(vectors),
+        "terms": len(idf),
+        "workers": workers,
+        "chunk_size": chunk_size,
+        "tokenize_seconds": round(tokenized - started, 3),
+        "weight_and_write_seconds": round(finished - tokenized, 3),
+        "total_seconds": round(finished - started, 3),
+        "peak_rss_mb": rss,
+        "peak_worker_rss_mb": worker_rss,
+    }
     print("Index built successfully")
+    for k, v in summary.items():
+        print(f"  {k}: {v}")
+    return summary
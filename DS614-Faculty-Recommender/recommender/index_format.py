@@ -0,0 +1,171 @@
+"""
+Binary, memory-mappable index format.
+
+Layout (little endian):
+
+    magic       8 bytes   b"FFINDEX\\0"
+    version     uint32
+    header_len  uint32
+    header      JSON      counts and {section: [offset, dtype, count]}
+    sections    each aligned to 64 bytes; offsets in the header count from
+                the first 64-byte boundary after it:
+        terms_blob / term_offsets   UTF-8 terms, sorted; term id = position
+        idf                         float64[n_terms]
+        term_ptr                    int64[n_terms + 1], postings of term t are
+        doc_ids / weights           doc_ids[term_ptr[t]:term_ptr[t+1]] (int32,
+                                    ascending) and the matching float64 weights
+        norms                       float64[n_docs]
+        meta_blob / meta_offsets    one JSON object per document
+
+read_index() maps the file read-only and returns NumPy views into it, so
+nothing but the vocabulary dict is copied at load time.
+"""
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from recommender.inverted_index import compute_norms
+
+MAGIC = b"FFINDEX\0"
+FORMAT_VERSION = 1
+ALIGN = 64
+
+_PREFIX = struct.Struct("<8sII")
+
+
+def _align(pos):
+    return -(-pos // ALIGN) * ALIGN
+
+
+def _blob(items):
+    offsets = np.zeros(len(items) + 1, dtype=np.int64)
+    parts = []
+    pos = 0
+    for i, b in enumerate(items):
+        parts.append(b)
+        pos += len(b)
+        offsets[i + 1] = pos
+    return np.frombuffer(b"".join(parts), dtype=np.uint8), offsets
+
+
+def write_index(path, vectors, meta, idf):
+    """Write (vectors, meta, idf) in the binary format, atomically replacing path."""
+    terms = sorted(idf)
+    vocab = {w: i for i, w in enumerate(terms)}
+
+    # postings per term id, doc ids ascending
+    per_term = [[] for _ in terms]
+    for doc_id, vec in enumerate(vectors):
+        for w, x in vec.items():
+            per_term[vocab[w]].append((doc_id, x))
+
+    term_ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    for t, plist in enumerate(per_term):
+        term_ptr[t + 1] = term_ptr[t] + len(plist)
+    doc_ids = np.fromiter((d for plist in per_term for d, _ in plist), dtype=np.int32, count=int(term_ptr[-1]))
+    weights = np.fromiter((x for plist in per_term for _, x in plist), dtype=np.float64, count=int(term_ptr[-1]))
+
+    terms_blob, term_offsets = _blob([w.encode("utf-8") for w in terms])
+    meta_blob, meta_offsets = _blob([json.dumps(row, default=str).encode("utf-8") for row in meta])
+
+    sections = {
+        "terms_blob": terms_blob,
+        "term_offsets": term_offsets,
+        "idf": np.asarray([idf[w] for w in terms], dtype=np.float64),
+        "term_ptr": term_ptr,
+        "doc_ids": doc_ids,
+        "weights": weights,
+        "norms": np.asarray(compute_norms(vectors), dtype=np.float64),
+        "meta_blob": meta_blob,
+        "meta_offsets": meta_offsets,
+    }
+
+    # section offsets are relative to the aligned end of the header
+    header = {"n_docs": len(vectors), "n_terms": len(terms), "nnz": int(term_ptr[-1]), "sections": {}}
+    pos = 0
+    for name, arr in sections.items():
+        pos = _align(pos)
+        header["sections"][name] = [pos, arr.dtype.str, len(arr)]
+        pos += arr.nbytes
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(header_bytes))
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, arr in sections.items():
+            f.write(b"\0" * (data_start + header["sections"][name][0] - f.tell()))
+            f.write(arr.tobytes())
+    os.replace(tmp, path)
+
+
+class MetaRows:
+    """Read-only sequence of metadata rows, decoded from the mapped file on access."""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return json.loads(self._blob[start:end].tobytes())
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class MappedIndex:
+    """Arrays of one binary index file, as read-only views into its mmap."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = _PREFIX.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a faculty index file")
+        if version != FORMAT_VERSION:
+            raise ValueError(
+                f"{path} has index format version {version}, expected {FORMAT_VERSION}; rebuild the index"
+            )
+
+        header = json.loads(self._mm[_PREFIX.size:_PREFIX.size + header_len])
+        data_start = _align(_PREFIX.size + header_len)
+        self.n_docs = header["n_docs"]
+        self.n_terms = header["n_terms"]
+
+        arrays = {
+            name: np.frombuffer(self._mm, dtype=np.dtype(dtype), count=count, offset=data_start + offset)
+            for name, (offset, dtype, count) in header["sections"].items()
+        }
+        self.idf = arrays["idf"]
+        self.term_ptr = arrays["term_ptr"]
+        self.doc_ids = arrays["doc_ids"]
+        self.weights = arrays["weights"]
+        self.norms = arrays["norms"]
+        self.meta = MetaRows(arrays["meta_blob"], arrays["meta_offsets"])
+
+        raw = arrays["terms_blob"].tobytes()
+        offs = arrays["term_offsets"].tolist()
+        self.terms = [raw[offs[i]:offs[i + 1]].decode("utf-8") for i in range(self.n_terms)]
+        self.vocab = {w: i for i, w in enumerate(self.terms)}
+
+    def postings(self, term_id):
+        s, e = self.term_ptr[term_id], self.term_ptr[term_id + 1]
+        return self.doc_ids[s:e], self.weights[s:e]
+
+
+def read_index(path):
+    return MappedIndex(path)
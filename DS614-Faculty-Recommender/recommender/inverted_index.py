@@ -0,0 +1,228 @@
+import heapq
+import math
+import pickle
+from array import array
+from bisect import bisect_left
+from operator import itemgetter
+
+from config.settings import INDEX_FILE
+
+
+# postings of a term: (doc ids, weights) as parallel arrays, doc ids ascending
+EMPTY_POSTINGS = (array("I"), array("d"))
+
+
+def build_postings(vectors):
+    # term -> (array of doc_ids, array of weights) in increasing doc_id order
+    postings = {}
+    for doc_id, vec in enumerate(vectors):
+        for w, x in vec.items():
+            plist = postings.get(w)
+            if plist is None:
+                plist = postings[w] = (array("I"), array("d"))
+            plist[0].append(doc_id)
+            plist[1].append(x)
+    return postings
+
+
+def pack_postings(postings):
+    """
+    Postings as (terms, ptr, doc_ids, values) with every term's arrays laid
+    end to end, which pickles far smaller than thousands of short arrays.
+    The postings of terms[i] are doc_ids[ptr[i]:ptr[i+1]].
+    """
+    terms = list(postings)
+    typecode = postings[terms[0]][1].typecode if terms else "d"
+    ptr = array("Q", [0])
+    ids = array("I")
+    values = array(typecode)
+    for w in terms:
+        plist_ids, plist_values = postings[w]
+        ids.extend(plist_ids)
+        values.extend(plist_values)
+        ptr.append(len(ids))
+    return terms, ptr, ids, values
+
+
+def unpack_postings(packed):
+    terms, ptr, ids, values = packed
+    return {
+        w: (ids[ptr[i]:ptr[i + 1]], values[ptr[i]:ptr[i + 1]])
+        for i, w in enumerate(terms)
+    }
+
+
+def compact_postings(postings):
+    # term -> [(doc_id, weight), ...] as written by older builds -> arrays
+    return {
+        w: (array("I", [d for d, _ in plist]), array("d", [x for _, x in plist]))
+        for w, plist in postings.items()
+    }
+
+
+def compute_norms(vectors):
+    return [math.sqrt(sum(x*x for x in vec.values())) for vec in vectors]
+
+
+def load_index(path=INDEX_FILE):
+    """
+    Load the pickled index and return (vectors, meta, idf, postings, norms).
+
+    Indexes written before postings were stored only hold (vectors, meta, idf),
+    so the postings and norms are derived once here for those. Vectors are
+    TermVectors, or {term: weight} dicts in indexes written before those.
+    Postings are stored packed (pack_postings); older files hold lists of
+    (doc_id, weight) tuples, which are compacted.
+    """
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+
+    if len(data) == 5:
+        vectors, meta, idf, postings, norms = data
+        if isinstance(postings, tuple):
+            postings = unpack_postings(postings)
+        elif postings and isinstance(next(iter(postings.values())), list):
+            postings = compact_postings(postings)
+        return vectors, meta, idf, postings, norms
+
+    vectors, meta, idf = data
+    return vectors, meta, idf, build_postings(vectors), compute_norms(vectors)
+
+
+def score_postings(q_vec, postings, norms, allowed=None):
+    """
+    Cosine similarity of the query against every document sharing at least
+    one term with it. Returns {doc_id: score}; documents without a common
+    term are never touched, nor are those with allowed[doc_id] == 0 when an
+    allowed mask is given.
+    """
+    q_norm = math.sqrt(sum(x*x for x in q_vec.values()))
+    if q_norm == 0:
+        return {}
+
+    acc = {}
+    for w, qx in q_vec.items():
+        if qx == 0:
+            continue
+        ids, weights = postings.get(w, EMPTY_POSTINGS)
+        if allowed is None:
+            for doc_id, x in zip(ids, weights):
+                acc[doc_id] = acc.get(doc_id, 0) + qx*x
+        else:
+            for doc_id, x in zip(ids, weights):
+                if allowed[doc_id]:
+                    acc[doc_id] = acc.get(doc_id, 0) + qx*x
+
+    return {
+        doc_id: num/(q_norm*norms[doc_id])
+        for doc_id, num in acc.items()
+        if norms[doc_id] != 0
+    }
+
+
+def top_k(scores, k):
+    # best k of {doc_id: score}, ties broken by doc_id
+    return heapq.nsmallest(k, scores.items(), key=lambda x: (-x[1], x[0]))
+
+
+# bounds and partial sums are rounded differently from the exact score, so
+# only prune documents that miss the threshold by more than this
+PRUNE_SLACK = 1e-12
+
+# while candidates are still being collected, the threshold is re-checked
+# every time the bound left for the unvisited terms shrinks by this factor
+CHECK_RATIO = 0.75
+
+
+def term_upper_bounds(postings, norms):
+    # term -> largest length-normalised weight it has in any document, i.e. the
+    # most a unit query weight on that term can add to a cosine score
+    return {
+        w: max(x/norms[doc_id] for doc_id, x in zip(ids, weights) if norms[doc_id] != 0)
+        for w, (ids, weights) in postings.items()
+    }
+
+
+def top_k_maxscore(q_vec, postings, inv_norms, bounds, k, allowed=None):
+    """
+    Top-k cosine retrieval with MaxScore pruning (term-at-a-time).
+
+    Query terms are visited from the highest score upper bound to the lowest.
+    Once the summed bounds of the terms still to visit fall below the k-th
+    best partial score, an unseen document can no longer make the top k:
+    from then on no new candidates are created, candidates that cannot reach
+    the threshold are dropped, and the remaining (usually long, low-weight)
+    postings are only probed for the surviving candidates. The k-th best
+    score is tracked with a bounded heap of size k.
+
+    inv_norms[doc_id] is 1/norm of the document (0 for empty documents).
+    With an allowed mask, only documents with allowed[doc_id] == 1 become
+    candidates. Returns [(doc_id, score), ...] ranked like
+    top_k(score_postings(...), k).
+    """
+    q_norm = math.sqrt(sum(x*x for x in q_vec.values()))
+    if q_norm == 0 or k <= 0:
+        return []
+
+    terms = []
+    for w, qx in q_vec.items():
+        ids, weights = postings.get(w, EMPTY_POSTINGS)
+        if qx == 0 or not ids:
+            continue
+        terms.append((qx/q_norm * bounds[w], qx/q_norm, ids, weights))
+    terms.sort(key=itemgetter(0), reverse=True)
+
+    def full_score(doc_id):
+        total = 0
+        for _, qw, ids, weights in terms:
+            p = bisect_left(ids, doc_id)
+            if p < len(ids) and ids[p] == doc_id:
+                total += qw*weights[p]*inv_norms[doc_id]
+        return total
+
+    remaining = sum(t[0] for t in terms)
+    next_check = remaining
+    acc = {}
+    exact = {}
+    threshold = 0
+    growing = True
+
+    for ub, qw, ids, weights in terms:
+        # the current k best candidates are scored in full; the k-th of those
+        # true scores is a safe threshold
+        if growing and len(acc) >= k and remaining <= next_check:
+            next_check = remaining * CHECK_RATIO
+            for doc_id in heapq.nlargest(k, acc, key=acc.get):
+                if doc_id not in exact:
+                    exact[doc_id] = full_score(doc_id)
+            threshold = max(threshold, heapq.nlargest(k, exact.values())[-1])
+            if remaining < threshold - PRUNE_SLACK:
+                # documents not seen so far cannot reach the top k any more
+                growing = False
+
+        if not growing:
+            floor = threshold - remaining - PRUNE_SLACK
+            acc = {d: s for d, s in acc.items() if s >= floor}
+
+        if growing:
+            get = acc.get
+            if allowed is None:
+                for doc_id, x in zip(ids, weights):
+                    acc[doc_id] = get(doc_id, 0) + qw*x*inv_norms[doc_id]
+            else:
+                for doc_id, x in zip(ids, weights):
+                    if allowed[doc_id]:
+                        acc[doc_id] = get(doc_id, 0) + qw*x*inv_norms[doc_id]
+        elif len(acc) * 8 < len(ids):
+            for doc_id in acc:
+                p = bisect_left(ids, doc_id)
+                if p < len(ids) and ids[p] == doc_id:
+                    acc[doc_id] += qw*weights[p]*inv_norms[doc_id]
+        else:
+            for doc_id, x in zip(ids, weights):
+                if doc_id in acc:
+                    acc[doc_id] += qw*x*inv_norms[doc_id]
+
+        remaining -= ub
+
+    return heapq.nsmallest(k, acc.items(), key=lambda x: (-x[1], x[0]))
@@ -0,0 +1,134 @@
+"""
+Per-stage latency metrics in the Prometheus text format.
+
+Code on the search path wraps each stage in `with stage("score"):`. Every
+stage duration goes into a histogram (exported on /metrics) and, while a
+request is being timed (timed_request()), into that request's
+{stage: seconds}, which the API returns in a Server-Timing header.
+
+With METRICS_ENABLED off, stage() hands back one shared no-op context
+manager, so an instrumented stage costs a function call and nothing else.
+"""
+import contextlib
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from config.settings import METRICS_ENABLED
+
+# seconds; search stages are sub-millisecond, whole requests up to seconds
+BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+_NULL = contextlib.nullcontext()
+_request_timings = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label value."""
+
+    def __init__(self, name, help, label, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}   # label value -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, label_value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(label_value)
+            if s is None:
+                s = self._series[label_value] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for value, s in sorted(series.items()):
+            label = f'{self.label}="{value}"'
+            total = 0
+            for le, n in zip(self.buckets + ("+Inf",), s):
+                total += n
+                lines.append(f'{self.name}_bucket{{{label},le="{le}"}} {total}')
+            lines.append(f"{self.name}_sum{{{label}}} {s[-2]}")
+            lines.append(f"{self.name}_count{{{label}}} {s[-1]}")
+        return lines
+
+
+STAGES = Histogram(
+    "recommender_stage_seconds", "Time spent in each stage of a search.", "stage",
+)
+REQUESTS = Histogram(
+    "recommender_request_seconds", "Time to handle a request, by path.", "path",
+)
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+
+
+def _no_stage(name):
+    return _NULL
+
+
+# Context manager timing one stage of the search path: stage("score")
+stage = _Stage if METRICS_ENABLED else _no_stage
+
+
+def record(name, seconds):
+    STAGES.observe(seconds, name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0) + seconds
+
+
+def timed_request():
+    """
+    Start collecting the stage timings of the current request (context);
+    returns the {stage: seconds} dict they are added to.
+    """
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing(timings, total=None):
+    """Server-Timing header value, durations in milliseconds."""
+    parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
+
+
+def gauge_lines(name, help, values, label=None):
+    """Prometheus lines of a gauge; values is a number, or {label value: number} with label."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    if label is None:
+        lines.append(f"{name} {values}")
+    else:
+        lines.extend(f'{name}{{{label}="{k}"}} {v}' for k, v in sorted(values.items()))
+    return lines
+
+
+def render(gauges=()):
+    """The /metrics page: stage and request histograms plus the given gauge lines."""
+    lines = STAGES.render() + REQUESTS.render() + list(gauges)
+    return "\n".join(lines) + "\n"
@@ -1,9 +1,17 @@
 import re
 
+from recommender.stemming import StemCache
+from config.settings import PHRASES_FILE, STEMMING, STEM_CACHE_SIZE
+
 def load_stopwords(path="data/stopwords.txt"):
     with open(path) as f:
         return set(w.strip() for w in f)
 
+def load_phrases(path):
+    # one phrase per line; blank lines and "#" comments are skipped
+    with open(path) as f:
+        return [p.strip() for p in f if p.strip() and not p.startswith("#")]
+
 STOPWORDS = load_stopwords()
 
 PHRASES = [
@@ -14,15 +22,99 @@ PHRASES = [
     "natural language processing"
 ]
 
+if PHRASES_FILE:
+    PHRASES = PHRASES + [p for p in load_phrases(PHRASES_FILE) if p not in PHRASES]
+
+TOKEN_RE = re.compile(r"[a-z_]+")
+
+
+def _trie_pattern(node):
+    # regex for a character trie; a terminal node makes its continuation
+    # optional, and the greedy "?" keeps the longest phrase
+    alts = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not alts:
+        return ""
+    if "" in node:
+        return "(?:" + "|".join(alts) + ")?"
+    if len(alts) == 1:
+        return alts[0]
+    return "(?:" + "|".join(alts) + ")"
+
+
+def compile_phrases(phrases):
+    """
+    One regex that finds every phrase of the dictionary in a single scan.
+
+    The phrases are merged into a character trie first, so the pattern
+    branches once per distinct prefix instead of once per phrase and the
+    cost of a scan barely grows with the size of the dictionary. Matches
+    are leftmost, then longest. None if there are no phrases.
+    """
+    trie = {}
+    for p in phrases:
+        p = " ".join(p.lower().split())
+        if not p:
+            continue
+        node = trie
+        for ch in p:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    if not trie:
+        return None
+    return re.compile(_trie_pattern(trie))
+
+
+class PhraseTokenizer:
+    """
+    Compiled preprocess(): lowercase once, merge dictionary phrases into
+    single tokens ("computer vision" -> "computer_vision") in one regex
+    pass, split into [a-z_] runs and drop stopwords and short tokens.
+
+    Phrases match anywhere in the lowercased text, exactly like the
+    str.replace loop this replaces; where two phrases overlap, the one
+    starting first (then the longer one) wins.
+
+    With a stemmer (e.g. a StemCache), the remaining words are stemmed;
+    merged phrases are kept as they are.
+    """
+
+    def __init__(self, phrases=PHRASES, stopwords=STOPWORDS, min_length=3, stemmer=None):
+        self.phrases = list(phrases)
+        self.stopwords = frozenset(stopwords)
+        self.min_length = min_length
+        self.stemmer = stemmer
+        self.phrase_re = compile_phrases(self.phrases)
+
+    def merge_phrases(self, text):
+        text = text.lower()
+        if self.phrase_re is None:
+            return text
+        return self.phrase_re.sub(lambda m: m.group().replace(" ", "_"), text)
+
+    def tokenize(self, text):
+        stopwords = self.stopwords
+        min_length = self.min_length
+        tokens = [
+            t for t in TOKEN_RE.findall(self.merge_phrases(text))
+            if len(t) >= min_length and t not in stopwords
+        ]
+        stem = self.stemmer
+        if stem is None:
+            return tokens
+        return [t if "_" in t else stem(t) for t in tokens]
+
+    def merge_tokens(self, tokens):
+        # tokens joined and split again, with dictionary phrases merged
+        return TOKEN_RE.findall(self.merge_phrases(" ".join(tokens)))
+
+
+TOKENIZER = PhraseTokenizer(stemmer=StemCache(STEM_CACHE_SIZE) if STEMMING else None)
+
 def merge_phrases(text):
-    text = text.lower()
-    for p in PHRASES:
-        text = text.replace(p, p.replace(" ", "_"))
-    return text
+    return TOKENIZER.merge_phrases(text)
 
 def preprocess(text):
-    text = merge_phrases(text.lower())
-    text = re.sub(r'[^a-z_ ]', ' ', text)
-    tokens = text.split()
-    tokens = [t for t in tokens if t not in STOPWORDS and len(t) > 2]
-    return tokens
+    return TOKENIZER.tokenize(text)
+
+def merge_tokens(tokens):
+    return TOKENIZER.merge_tokens(tokens)
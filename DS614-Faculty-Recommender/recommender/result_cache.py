@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config.settings import RESULT_CACHE_SIZE, RESULT_CACHE_TTL
+
+
+def cache_key(tokens, k):
+    # TF-IDF only sees the bag of tokens, so their order does not matter
+    return tuple(sorted(tokens)), k
+
+
+class ResultCache:
+    """
+    In-process LRU cache of search results with a time-to-live.
+
+    Entries belong to one index snapshot (callers put its version in the
+    key); whoever swaps in a new snapshot calls invalidate() to drop them,
+    so lookups never touch the index file. Thread safe, since FastAPI runs
+    sync endpoints in a thread pool.
+    """
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value for key, or None on a miss."""
+        if self.maxsize <= 0:
+            return None
+
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] < time.monotonic():
+                del self._data[key]
+                item = None
+
+            if item is None:
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def invalidate(self):
+        # a new index snapshot is served: every entry is stale
+        with self._lock:
+            if self._data:
+                self.invalidations += 1
+                self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,426 @@
+import math
+import os
+import time
+
+from recommender.inverted_index import (
+    load_index, build_postings, compute_norms, score_postings, top_k,
+    term_upper_bounds, top_k_maxscore,
+)
+from recommender import sparse_backend
+from recommender.index_format import read_index
+from recommender.vectorizer import compute_tf, compute_tfidf
+from recommender.term_vectors import Vocabulary, TermVector
+from recommender.field_index import FieldIndex, field_counts
+from recommender.filters import FilterIndex
+from recommender.semantic import LsaModel
+from recommender.suggest import Suggester
+from recommender.spelling import SpellIndex
+from recommender.preprocessing import merge_tokens
+from recommender.metrics import stage
+from config.settings import (
+    INDEX_FILE, MMAP_INDEX_FILE, FIELD_INDEX_FILE, LSA_FILE, INDEX_FORMAT, SEARCH_BACKEND, HYBRID_ALPHA,
+    SPELL_MAX_DISTANCE,
+)
+
+import numpy as np
+
+BACKENDS = ("postings", "maxscore", "sparse", "bm25f", "lsa", "hybrid")
+
+
+class SearchIndex:
+    """
+    One loaded snapshot of the index plus the structures derived from it.
+
+    Document vectors are kept as TermVectors over an integer vocabulary
+    (term ids follow the sorted IDF terms) and postings as (doc_ids, weights)
+    arrays; vectors can be passed in either as TermVectors or as
+    {term: weight} dicts, which are compacted here.
+    The sparse matrix, the MaxScore term bounds, the filter bitsets, the
+    autocomplete keys and the typo-correction deletes are only built, and the per-field index for bm25f and
+    the LSA model only loaded, the first time something needs them.
+    """
+
+    def __init__(self, vectors, meta, idf, postings=None, norms=None, fields=None):
+        self.vocab = Vocabulary(idf)
+        if postings is None or norms is None:
+            dicts = [v.to_dict(self.vocab) if isinstance(v, TermVector) else v for v in vectors]
+            postings = postings if postings is not None else build_postings(dicts)
+            norms = norms if norms is not None else compute_norms(dicts)
+        self.vectors = [
+            v if isinstance(v, TermVector) else TermVector.from_dict(v, self.vocab)
+            for v in vectors
+        ]
+        self.meta = meta
+        self.idf = idf
+        self.postings = postings
+        self.norms = norms
+        self._init_lazy(fields)
+
+    def _init_lazy(self, fields=None):
+        # the derived structures, built on first use (or by warm()), and the
+        # snapshot's file details; shared by every SearchIndex constructor
+        self._fields = fields
+        self._filters = None
+        self._suggester = None
+        self._spelling = None
+        self._lsa = None
+        self._matrix = None
+        self._bounds = None
+        self._inv_norms = None
+        self.path = self.version = self.loaded_at = None
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        return cls(*load_index(path))
+
+    @property
+    def fields(self):
+        # per-field index (FIELD_INDEX_FILE), written next to the index files
+        # by every build; indexes built before it existed get one built from
+        # their metadata rows (which still hold the bio; newer rows do not)
+        if self._fields is None:
+            fields = None
+            if FIELD_INDEX_FILE.exists():
+                fields = FieldIndex.load(FIELD_INDEX_FILE)
+            if fields is None or fields.n_docs != len(self.meta):
+                fields = FieldIndex.from_counts(field_counts(row) for row in self.meta)
+            self._fields = fields
+        return self._fields
+
+    @property
+    def lsa(self):
+        # LSA model (LSA_FILE) written by a build with --lsa; documents
+        # that do not match the index are folded in again
+        if self._lsa is None:
+            if not LSA_FILE.exists():
+                raise ValueError("No LSA model: build the index with --lsa to use the lsa and hybrid backends")
+            lsa = LsaModel.load()
+            if len(lsa.docs) != len(self.meta):
+                lsa.docs = lsa.embed_matrix(self.matrix[1], self.matrix[0])
+            self._lsa = lsa
+        return self._lsa
+
+    @property
+    def filters(self):
+        # bitsets for metadata filters and must / exclude terms
+        if self._filters is None:
+            self._filters = FilterIndex(self.meta, self.postings)
+        return self._filters
+
+    @property
+    def suggester(self):
+        # prefix autocomplete over names, terms and phrases (/suggest)
+        if self._suggester is None:
+            self._suggester = Suggester.from_index(self.meta, self.document_frequencies())
+        return self._suggester
+
+    @property
+    def spelling(self):
+        # deletion index of the vocabulary for typo correction
+        if self._spelling is None:
+            self._spelling = SpellIndex(self.document_frequencies())
+        return self._spelling
+
+    @property
+    def matrix(self):
+        # (vocab, L2-normalised CSR matrix)
+        if self._matrix is None:
+            self._matrix = self.vocab.ids, sparse_backend.matrix_from_term_vectors(self.vectors, len(self.vocab))
+        return self._matrix
+
+    @property
+    def bounds(self):
+        # MaxScore per-term upper bounds and 1/norm per document
+        if self._bounds is None:
+            self._inv_norms = [1/n if n else 0 for n in self.norms]
+            self._bounds = term_upper_bounds(self.postings, self.norms)
+        return self._bounds, self._inv_norms
+
+    def query_vector(self, tokens):
+        return compute_tfidf(compute_tf(tokens), self.idf)
+
+    def correct_tokens(self, tokens):
+        """
+        (tokens, {typed token: term}) with every token missing from the
+        vocabulary replaced by its closest term, when one is close enough.
+        """
+        if not SPELL_MAX_DISTANCE or all(t in self.idf for t in tokens):
+            return tokens, {}
+        fixes = {}
+        for t in tokens:
+            if t not in self.idf and t not in fixes:
+                fix = self.spelling.correct(t)
+                if fix is not None:
+                    fixes[t] = fix
+        if not fixes:
+            return tokens, {}
+        # phrases merged again, so "machin lerning" becomes machine_learning
+        return merge_tokens([fixes.get(t, t) for t in tokens]), fixes
+
+    def document_vectors(self):
+        # {term: weight} dicts, for code that edits or rewrites the index
+        return [v.to_dict(self.vocab) for v in self.vectors]
+
+    def document_frequencies(self):
+        return {term: len(plist[0]) for term, plist in self.postings.items()}
+
+    def warm(self, backend=None):
+        """Build whatever the backend needs up front instead of on the first query."""
+        backend = backend or SEARCH_BACKEND
+        self.suggester
+        if SPELL_MAX_DISTANCE:
+            self.spelling
+        if backend == "maxscore":
+            self.bounds
+        elif backend == "sparse":
+            self.matrix
+        elif backend == "bm25f":
+            self.fields
+        elif backend in ("lsa", "hybrid"):
+            self.matrix
+            self.lsa
+
+    def semantic_scores(self, q_vecs, backend, alpha=None, rows=None):
+        """
+        (len(q_vecs), n) lsa or hybrid scores of every document, or of the
+        given rows. hybrid is alpha * TF-IDF cosine + (1 - alpha) * LSA cosine.
+        """
+        scores = self.lsa.score_batch(q_vecs, rows).astype(np.float64)
+        if backend == "hybrid":
+            alpha = HYBRID_ALPHA if alpha is None else alpha
+            vocab, matrix = self.matrix
+            lexical = sparse_backend.score_batch(q_vecs, vocab, matrix if rows is None else matrix[rows])
+            scores = alpha*lexical + (1 - alpha)*scores
+        return scores
+
+    def rank(self, q_vec, k, backend=None, field_weights=None, candidates=None, alpha=None):
+        """
+        Best k documents for q_vec as [(doc_id, score), ...]. field_weights
+        ({field: weight}, default FIELD_WEIGHTS) only applies to bm25f and
+        alpha (default HYBRID_ALPHA) to hybrid.
+        With candidates (filters.Candidates), only those documents are scored.
+        """
+        backend = backend or SEARCH_BACKEND
+        allowed = None if candidates is None else candidates.allowed
+
+        if backend in ("lsa", "hybrid"):
+            return self.rank_batch([q_vec], [k], backend, field_weights, candidates, alpha)[0]
+
+        if backend == "bm25f":
+            # BM25F over the query terms; TF-IDF weights are not used
+            with stage("score"):
+                scores = self.fields.scores(q_vec, field_weights, allowed=allowed)
+            with stage("sort"):
+                return top_k(scores, k)
+
+        if backend == "postings":
+            # only documents sharing a query term are scored
+            with stage("score"):
+                scores = score_postings(q_vec, self.postings, self.norms, allowed)
+            with stage("sort"):
+                return top_k(scores, k)
+
+        if backend == "maxscore":
+            # pruning interleaves scoring and selecting, so it is all "score"
+            bounds, inv_norms = self.bounds
+            with stage("score"):
+                return top_k_maxscore(q_vec, self.postings, inv_norms, bounds, k, allowed)
+
+        if backend == "sparse":
+            vocab, matrix = self.matrix
+            # score only the candidate rows, then map positions back to doc ids
+            ids = None if candidates is None else candidates.ids
+            with stage("score"):
+                scores = sparse_backend.score_matrix(q_vec, vocab, matrix if ids is None else matrix[ids])
+            with stage("sort"):
+                ranked = sparse_backend.top_k(scores, k)
+            return ranked if ids is None else [(int(ids[i]), score) for i, score in ranked]
+
+        raise ValueError(f"Unknown search backend: {backend}")
+
+    def rank_batch(self, q_vecs, ks, backend=None, field_weights=None, candidates=None, alpha=None):
+        """
+        rank() for many queries at once through one sparse (or, for lsa and
+        hybrid, dense) mat-mat product. candidates, if given, applies to
+        every query.
+        """
+        if not q_vecs:
+            return []
+        backend = backend or SEARCH_BACKEND
+        if backend == "bm25f":
+            return [self.rank(q, k, "bm25f", field_weights, candidates) for q, k in zip(q_vecs, ks)]
+        ids = None if candidates is None else candidates.ids
+        with stage("score"):
+            if backend in ("lsa", "hybrid"):
+                scores = self.semantic_scores(q_vecs, backend, alpha, ids)
+            else:
+                vocab, matrix = self.matrix
+                scores = sparse_backend.score_batch(q_vecs, vocab, matrix if ids is None else matrix[ids])
+        with stage("sort"):
+            ranked = [sparse_backend.top_k(row, k) for row, k in zip(scores, ks)]
+        if ids is None:
+            return ranked
+        # positions among the candidate rows back to doc ids
+        return [[(int(ids[i]), score) for i, score in r] for r in ranked]
+
+
+class MappedPostings:
+    """Read-only term -> (doc_ids, weights) view over a MappedIndex."""
+
+    def __init__(self, mapped):
+        self.mapped = mapped
+
+    def get(self, term, default=None):
+        t = self.mapped.vocab.get(term)
+        if t is None:
+            return default
+        ids, weights = self.mapped.postings(t)
+        return ids.tolist(), weights.tolist()
+
+    def __getitem__(self, term):
+        plist = self.get(term)
+        if plist is None:
+            raise KeyError(term)
+        return plist
+
+    def __contains__(self, term):
+        return term in self.mapped.vocab
+
+    def __iter__(self):
+        return iter(self.mapped.terms)
+
+    def __len__(self):
+        return self.mapped.n_terms
+
+    def items(self):
+        for term in self.mapped.terms:
+            yield term, self[term]
+
+
+class MappedSearchIndex(SearchIndex):
+    """
+    SearchIndex over the memory-mapped binary format (recommender.index_format).
+
+    Postings, weights and norms stay NumPy views into the file. The postings
+    backend accumulates scores with one vectorised update per query term, in
+    the same order and with the same arithmetic as score_postings.
+    """
+
+    def __init__(self, mapped):
+        self.mapped = mapped
+        self.vectors = None
+        self.meta = mapped.meta
+        self.idf = dict(zip(mapped.terms, mapped.idf.tolist()))
+        self.postings = MappedPostings(mapped)
+        self.norms = mapped.norms
+        self._init_lazy()
+
+    @classmethod
+    def load(cls, path=MMAP_INDEX_FILE):
+        return cls(read_index(path))
+
+    @property
+    def matrix(self):
+        if self._matrix is None:
+            m = self.mapped
+            self._matrix = m.vocab, sparse_backend.matrix_from_postings(m.term_ptr, m.doc_ids, m.weights, m.n_docs)
+        return self._matrix
+
+    @property
+    def bounds(self):
+        if self._bounds is None:
+            m = self.mapped
+            with np.errstate(divide="ignore"):
+                inv = np.where(m.norms > 0, 1 / m.norms, 0)
+            upper = np.maximum.reduceat(m.weights * inv[m.doc_ids], m.term_ptr[:-1])
+            self._inv_norms = inv.tolist()
+            self._bounds = dict(zip(m.terms, upper.tolist()))
+        return self._bounds, self._inv_norms
+
+    def document_frequencies(self):
+        return dict(zip(self.mapped.terms, np.diff(self.mapped.term_ptr).tolist()))
+
+    def document_vectors(self):
+        # rebuilt from the term-major postings; only needed off the query path
+        m = self.mapped
+        vectors = [{} for _ in range(m.n_docs)]
+        ids, weights = m.doc_ids.tolist(), m.weights.tolist()
+        ptr = m.term_ptr.tolist()
+        for t, w in enumerate(m.terms):
+            for p in range(ptr[t], ptr[t + 1]):
+                vectors[ids[p]][w] = weights[p]
+        return vectors
+
+    def score(self, q_vec, mask=None):
+        # mask (bool per document): documents outside it score 0
+        m = self.mapped
+        q_norm = math.sqrt(sum(x*x for x in q_vec.values()))
+        acc = np.zeros(m.n_docs)
+        if q_norm == 0:
+            return acc
+
+        for w, qx in q_vec.items():
+            t = m.vocab.get(w)
+            if t is None or qx == 0:
+                continue
+            ids, weights = m.postings(t)
+            acc[ids] += qx*weights
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = acc/(q_norm*m.norms)
+        scores[m.norms == 0] = 0
+        if mask is not None:
+            scores[~mask] = 0
+        return scores
+
+    def rank(self, q_vec, k, backend=None, field_weights=None, candidates=None, alpha=None):
+        if (backend or SEARCH_BACKEND) == "postings":
+            mask = None if candidates is None else candidates.mask
+            with stage("score"):
+                scores = self.score(q_vec, mask)
+            with stage("sort"):
+                return sparse_backend.top_k(scores, k)
+        return super().rank(q_vec, k, backend, field_weights, candidates, alpha)
+
+
+def active_index_file():
+    """
+    The index file the engine should serve, according to INDEX_FORMAT.
+    "auto" serves the more recently written of the two files (the mmap one
+    on a tie), so a later pickle-only build is not hidden by an old index.bin.
+    """
+    if INDEX_FORMAT == "mmap":
+        return MMAP_INDEX_FILE
+    if INDEX_FORMAT == "auto":
+        mmap_version = index_file_version(MMAP_INDEX_FILE)
+        pickle_version = index_file_version(INDEX_FILE)
+        if mmap_version is not None and (pickle_version is None or mmap_version[0] >= pickle_version[0]):
+            return MMAP_INDEX_FILE
+    return INDEX_FILE
+
+
+def index_file_version(path):
+    # (mtime, size) of an index file, None if it does not exist
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def load_search_index(path=None):
+    """
+    Load the index at path (default: active_index_file()). The snapshot
+    remembers its path, file version and load time so callers can tell
+    when the file on disk has moved on.
+    """
+    path = path or active_index_file()
+    version = index_file_version(path)
+    if str(path).endswith(".pkl"):
+        index = SearchIndex.load(path)
+    else:
+        index = MappedSearchIndex.load(path)
+    index.path = path
+    index.version = version
+    index.loaded_at = time.time()
+    return index
@@ -0,0 +1,150 @@
+"""
+Latent semantic analysis (LSA) over the TF-IDF matrix.
+
+TruncatedSVD of the L2-normalised document-term matrix gives every term a
+dense k-dimensional vector (a row of the term matrix); a document or query
+embeds as the TF-IDF-weighted sum of its term vectors, scaled to unit
+length. Terms that occur in similar documents ("neural networks", "deep
+learning") end up close together, so a query can match a profile that
+shares none of its words.
+
+The document embeddings are a float32 (n_docs, k) matrix saved next to the
+index; a query is embedded from the rows of its few terms and scored with
+one dense matrix-vector product. Only the build runs the SVD: documents
+indexed later are folded into the existing model with the same projection.
+"""
+import os
+
+import numpy as np
+
+from config.settings import LSA_FILE, LSA_DOCS_FILE
+
+DTYPE = np.float32
+
+# "auto" dimensions: at most this many, and at most half the documents
+MAX_AUTO_COMPONENTS = 100
+
+# float32 rounding leaves unrelated documents with scores around +-1e-8;
+# anything smaller than this counts as no match
+MIN_SCORE = 1e-6
+
+
+def auto_components(n_docs):
+    return max(1, min(MAX_AUTO_COMPONENTS, n_docs // 2))
+
+
+def parse_components(value):
+    """ "auto" or a positive number of LSA dimensions."""
+    if str(value).strip().lower() == "auto":
+        return "auto"
+    n = int(value)
+    if n <= 0:
+        raise ValueError(f"LSA dimensions must be positive or auto, not {value}")
+    return n
+
+
+def normalize(rows):
+    # unit-length rows (zero rows stay zero), in place
+    norms = np.linalg.norm(rows, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    rows /= norms
+    return rows
+
+
+class LsaModel:
+    """Term matrix (one k-dimensional row per term) and the document embeddings."""
+
+    def __init__(self, terms, term_matrix, docs):
+        self.terms = list(terms)
+        self.ids = {w: i for i, w in enumerate(self.terms)}
+        self.term_matrix = term_matrix
+        self.docs = docs
+
+    @property
+    def n_components(self):
+        return self.term_matrix.shape[1]
+
+    @classmethod
+    def fit(cls, matrix, vocab, n_components, seed=0):
+        """
+        Fit on the L2-normalised CSR matrix whose columns are vocab
+        ({term: column}). n_components is capped by the matrix rank;
+        "auto" derives it from the number of documents (auto_components).
+        """
+        from sklearn.decomposition import TruncatedSVD
+
+        if n_components == "auto":
+            n_components = auto_components(matrix.shape[0])
+        n_components = max(1, min(n_components, matrix.shape[0] - 1, matrix.shape[1] - 1))
+        svd = TruncatedSVD(n_components=n_components, algorithm="randomized", random_state=seed)
+        svd.fit(matrix)
+
+        terms = [None] * len(vocab)
+        for w, col in vocab.items():
+            terms[col] = w
+        model = cls(terms, np.ascontiguousarray(svd.components_.T, dtype=DTYPE), None)
+        model.docs = model.embed_matrix(matrix, vocab)
+        return model
+
+    @classmethod
+    def load(cls, path=LSA_FILE, docs_path=LSA_DOCS_FILE):
+        with np.load(path) as f:
+            terms, term_matrix = f["terms"].tolist(), f["term_matrix"]
+        # the document matrix is mapped, not read: workers share its pages
+        return cls(terms, term_matrix, np.load(docs_path, mmap_mode="r"))
+
+    def save(self, path=LSA_FILE, docs_path=LSA_DOCS_FILE):
+        # write aside and rename, like the index files
+        for target, write in (
+            (docs_path, lambda f: np.save(f, self.docs)),
+            (path, lambda f: np.savez(f, terms=np.array(self.terms), term_matrix=self.term_matrix)),
+        ):
+            tmp = f"{target}.tmp"
+            with open(tmp, "wb") as f:
+                write(f)
+            os.replace(tmp, target)
+
+    def projection(self, vocab):
+        # (len(vocab), k) term rows in the column order of another vocabulary;
+        # terms unknown to the model get zero rows
+        cols = []
+        rows = []
+        for w, col in vocab.items():
+            i = self.ids.get(w)
+            if i is not None:
+                cols.append(col)
+                rows.append(i)
+        proj = np.zeros((len(vocab), self.n_components), dtype=DTYPE)
+        proj[cols] = self.term_matrix[rows]
+        return proj
+
+    def embed_matrix(self, matrix, vocab):
+        """Unit-length embeddings of the rows of a CSR matrix over vocab (fold-in)."""
+        docs = matrix @ self.projection(vocab)
+        return normalize(np.asarray(docs, dtype=DTYPE))
+
+    def embed_queries(self, q_vecs):
+        """(len(q_vecs), k) unit-length embeddings of {term: weight} query vectors."""
+        out = np.zeros((len(q_vecs), self.n_components), dtype=DTYPE)
+        for n, q_vec in enumerate(q_vecs):
+            rows = []
+            weights = []
+            for w, x in q_vec.items():
+                i = self.ids.get(w)
+                if i is not None:
+                    rows.append(i)
+                    weights.append(x)
+            if rows:
+                out[n] = np.asarray(weights, dtype=DTYPE) @ self.term_matrix[rows]
+        return normalize(out)
+
+    def scores(self, q_vec, rows=None):
+        """Cosine of the query and every document (or just the given rows) in LSA space."""
+        return self.score_batch([q_vec], rows)[0]
+
+    def score_batch(self, q_vecs, rows=None):
+        # row i holds the scores for q_vecs[i]
+        docs = self.docs if rows is None else self.docs[rows]
+        scores = self.embed_queries(q_vecs) @ docs.T
+        scores[np.abs(scores) < MIN_SCORE] = 0
+        return scores
@@ -0,0 +1,130 @@
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix
+
+
+def build_vocab(vectors):
+    vocab = {}
+    for vec in vectors:
+        for w in vec:
+            if w not in vocab:
+                vocab[w] = len(vocab)
+    return vocab
+
+
+def normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix = csr_matrix(matrix.multiply(1 / norms[:, None]))
+    matrix.sort_indices()
+    return matrix
+
+
+def build_matrix(vectors, vocab=None):
+    """
+    Stack the TF-IDF dicts into a CSR matrix (one row per document) with
+    every row scaled to unit L2 norm, so a dot product is the cosine.
+    Returns (vocab, matrix) where vocab maps term -> column.
+    """
+    if vocab is None:
+        vocab = build_vocab(vectors)
+
+    indptr = [0]
+    indices = []
+    data = []
+    for vec in vectors:
+        for w, x in vec.items():
+            indices.append(vocab[w])
+            data.append(x)
+        indptr.append(len(indices))
+
+    matrix = csr_matrix(
+        (np.asarray(data, dtype=np.float64),
+         np.asarray(indices, dtype=np.int32),
+         np.asarray(indptr, dtype=np.int64)),
+        shape=(len(vectors), len(vocab)),
+    )
+    return vocab, normalize_rows(matrix)
+
+
+def matrix_from_term_vectors(vectors, n_terms):
+    """Same matrix as build_matrix, from TermVectors (column t = term id t)."""
+    indptr = np.zeros(len(vectors) + 1, dtype=np.int64)
+    np.cumsum([len(v) for v in vectors], out=indptr[1:])
+    indices = np.frombuffer(b"".join(v.ids.tobytes() for v in vectors), dtype=np.uint32)
+    typecode = vectors[0].weights.typecode if vectors else "d"
+    data = np.frombuffer(b"".join(v.weights.tobytes() for v in vectors), dtype=np.dtype(typecode))
+    matrix = csr_matrix(
+        (data.astype(np.float64), indices.astype(np.int32), indptr),
+        shape=(len(vectors), n_terms),
+    )
+    return normalize_rows(matrix)
+
+
+def matrix_from_postings(term_ptr, doc_ids, weights, n_docs):
+    """Same matrix as build_matrix, from term-major postings arrays (column t = term id t)."""
+    by_term = csc_matrix((weights, doc_ids, term_ptr), shape=(n_docs, len(term_ptr) - 1))
+    return normalize_rows(by_term.tocsr())
+
+
+def query_vector(q_vec, vocab):
+    """Dense unit-length query vector over the vocabulary (unknown terms dropped)."""
+    q = np.zeros(len(vocab), dtype=np.float64)
+    for w, x in q_vec.items():
+        col = vocab.get(w)
+        if col is not None:
+            q[col] = x
+    n = np.linalg.norm(q)
+    if n:
+        q /= n
+    return q
+
+
+def score_matrix(q_vec, vocab, matrix):
+    # one sparse mat-vec product scores every document
+    return matrix @ query_vector(q_vec, vocab)
+
+
+def query_matrix(q_vecs, vocab):
+    """CSR matrix with one unit-length row per query vector."""
+    indptr = [0]
+    indices = []
+    data = []
+    for q_vec in q_vecs:
+        row = {}
+        for w, x in q_vec.items():
+            col = vocab.get(w)
+            if col is not None:
+                row[col] = x
+        n = sum(x*x for x in row.values()) ** 0.5
+        for col, x in row.items():
+            indices.append(col)
+            data.append(x / n)
+        indptr.append(len(indices))
+
+    return csr_matrix(
+        (np.asarray(data, dtype=np.float64),
+         np.asarray(indices, dtype=np.int32),
+         np.asarray(indptr, dtype=np.int64)),
+        shape=(len(q_vecs), len(vocab)),
+    )
+
+
+def score_batch(q_vecs, vocab, matrix):
+    # one sparse mat-mat product scores every query against every document;
+    # row i holds the scores for q_vecs[i]
+    return (query_matrix(q_vecs, vocab) @ matrix.T).toarray()
+
+
+def top_k(scores, k):
+    """
+    Indices of the k best positive scores as [(doc_id, score), ...], ordered
+    by score descending and doc_id ascending on ties, like the postings path.
+    """
+    cand = np.flatnonzero(scores > 0)
+    if len(cand) > k:
+        cut = len(cand) - k
+        kth = np.partition(scores[cand], cut)[cut]
+        cand = cand[scores[cand] >= kth]
+
+    order = np.lexsort((cand, -scores[cand]))[:k]
+    return [(int(cand[i]), float(scores[cand[i]])) for i in order]
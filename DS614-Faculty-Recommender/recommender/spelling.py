@@ -0,0 +1,149 @@
+"""
+Typo correction of query tokens (SymSpell-style deletion index).
+
+Every vocabulary term is filed under all the strings left after deleting
+up to max_distance characters from its first prefix_length characters.
+A misspelt token generates the same kind of deletes, and the terms filed
+under any of them are the only candidates: together they include every
+term within max_distance edits (insertions, deletions, substitutions and
+transpositions of neighbours), so a lookup never scans the vocabulary.
+The candidates are then checked with the real edit distance, and the
+closest one wins, then the one in the most documents.
+
+A token missing from the vocabulary is as often a real word the corpus
+never uses ("drones", "rust") as a typo, and rewriting it into the
+nearest term ("cones", "trust") silently answers a different query. So a
+correction has to be likely: tokens shorter than MIN_TOKEN are left
+alone; tokens shorter than LONG_TOKEN get one edit, and only to a term in
+at least MIN_DF documents (a short word is close to many rare terms); the
+first letter is never changed, since typos rarely hit it and a different
+first letter mostly means a different word ("vaccines", "machines"); and
+words listed in SPELL_WORDS_FILE are never corrected.
+
+The deletes are stored as two NumPy arrays (string hash, term id) sorted
+by hash instead of a dict of strings, which keeps 100k terms at a few
+tens of MB. A hash collision only adds a candidate that fails the check.
+"""
+import numpy as np
+
+from config.settings import SPELL_MAX_DISTANCE, SPELL_WORDS_FILE
+
+# shorter tokens (abbreviations, short words) are one edit from too many terms
+MIN_TOKEN = 5
+# shorter tokens only get one edit: two would turn them into anything
+LONG_TOKEN = 10
+# for shorter tokens, a term in fewer documents is as likely another word
+# as the intended one
+MIN_DF = 2
+PREFIX_LENGTH = 7
+# corrections remembered per index; the memo is emptied when it is full
+MEMO_SIZE = 4096
+
+
+def deletes(word, max_distance):
+    """word and every string left after deleting up to max_distance characters."""
+    out = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+        out |= frontier
+    return out
+
+
+def edit_distance(a, b, limit):
+    """
+    Optimal string alignment distance (Levenshtein plus transpositions of
+    neighbours), or limit + 1 as soon as it is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    # a shared prefix and suffix cost nothing, and typos leave long ones
+    i = 0
+    while i < len(a) and i < len(b) and a[i] == b[i]:
+        i += 1
+    a, b = a[i:], b[i:]
+    while a and b and a[-1] == b[-1]:
+        a, b = a[:-1], b[:-1]
+    if not a or not b:
+        return min(len(a) + len(b), limit + 1)
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return min(prev[-1], limit + 1)
+
+
+def load_words(path):
+    # one word per line; blank lines and "#" comments are skipped
+    with open(path) as f:
+        return {w.strip().lower() for w in f if w.strip() and not w.startswith("#")}
+
+
+class SpellIndex:
+    """Closest vocabulary term of an unknown token, within max_distance edits."""
+
+    def __init__(self, doc_freqs, max_distance=SPELL_MAX_DISTANCE, prefix_length=PREFIX_LENGTH, words=None):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        # known words outside the vocabulary, never "corrected"
+        if words is None:
+            words = load_words(SPELL_WORDS_FILE) if SPELL_WORDS_FILE else ()
+        self.words = frozenset(words)
+        # phrase tokens ("computer_vision") are only reached through their words
+        self.terms = sorted(t for t in doc_freqs if "_" not in t)
+        self.dfs = [doc_freqs[t] for t in self.terms]
+
+        hashes, ids = [], []
+        for t, term in enumerate(self.terms):
+            for d in deletes(term[:prefix_length], max_distance):
+                hashes.append(hash(d))
+                ids.append(t)
+        hashes = np.array(hashes, dtype=np.int64)
+        order = np.argsort(hashes, kind="stable")
+        self.hashes = hashes[order]
+        self.ids = np.array(ids, dtype=np.int32)[order]
+        self._memo = {}
+
+    def candidates(self, word, max_distance):
+        keys = np.fromiter((hash(d) for d in deletes(word[:self.prefix_length], max_distance)), dtype=np.int64)
+        lo = np.searchsorted(self.hashes, keys, side="left")
+        hi = np.searchsorted(self.hashes, keys, side="right")
+        return {t for a, b in zip(lo.tolist(), hi.tolist()) if a < b for t in self.ids[a:b].tolist()}
+
+    def correct(self, word):
+        """The vocabulary term closest to word, or None if none is close enough."""
+        try:
+            return self._memo[word]
+        except KeyError:
+            pass
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+        fix = self._memo[word] = self._closest(word)
+        return fix
+
+    def _closest(self, word):
+        if len(word) < MIN_TOKEN or "_" in word or word in self.words:
+            return None
+        long_token = len(word) >= LONG_TOKEN
+        limit = min(self.max_distance, 2 if long_token else 1)
+        if limit <= 0:
+            return None
+        min_df = 1 if long_token else MIN_DF
+        best = None
+        for t in self.candidates(word, limit):
+            if self.dfs[t] < min_df or self.terms[t][0] != word[0]:
+                continue
+            d = edit_distance(word, self.terms[t], limit)
+            if d <= limit:
+                key = (d, -self.dfs[t], self.terms[t])
+                if best is None or key < best:
+                    best = key
+        return None if best is None else best[2]
@@ -0,0 +1,161 @@
+"""
+Porter stemmer (M.F. Porter, "An algorithm for suffix stripping", 1980).
+
+Maps inflected and derived forms to one stem: "network", "networks" and
+"networking" all become "network", "computing" and "computation" become
+"comput". Stems are not always words. The algorithm is the original
+one, as in Porter's reference implementation.
+
+StemCache memoizes stem(): a corpus has far fewer distinct surface forms
+than tokens, so each form is stemmed once. The table is bounded; once
+full, new forms are stemmed on every call instead of evicting old ones.
+"""
+
+VOWELS = frozenset("aeiou")
+
+
+def _cons(w, i):
+    # y is a consonant at the start and after a vowel, a vowel otherwise
+    ch = w[i]
+    if ch in VOWELS:
+        return False
+    if ch == "y":
+        return i == 0 or not _cons(w, i - 1)
+    return True
+
+
+def _measure(stem):
+    # m in [C](VC)^m[V]
+    n = len(stem)
+    i = 0
+    while i < n and _cons(stem, i):
+        i += 1
+    m = 0
+    while i < n:
+        while i < n and not _cons(stem, i):
+            i += 1
+        if i >= n:
+            break
+        m += 1
+        while i < n and _cons(stem, i):
+            i += 1
+    return m
+
+
+def _has_vowel(stem):
+    return any(not _cons(stem, i) for i in range(len(stem)))
+
+
+def _double_cons(w):
+    return len(w) >= 2 and w[-1] == w[-2] and _cons(w, len(w) - 1)
+
+
+def _cvc(w):
+    # consonant-vowel-consonant, the last not w, x or y ("hop", not "snow")
+    n = len(w)
+    return (
+        n >= 3 and _cons(w, n - 3) and not _cons(w, n - 2) and _cons(w, n - 1)
+        and w[-1] not in "wxy"
+    )
+
+
+# (suffix, replacement); the first suffix that matches decides, even when
+# its condition on the stem then fails
+STEP2 = (
+    ("ational", "ate"), ("tional", "tion"), ("enci", "ence"), ("anci", "ance"),
+    ("izer", "ize"), ("abli", "able"), ("alli", "al"), ("entli", "ent"),
+    ("eli", "e"), ("ousli", "ous"), ("ization", "ize"), ("ation", "ate"),
+    ("ator", "ate"), ("alism", "al"), ("iveness", "ive"), ("fulness", "ful"),
+    ("ousness", "ous"), ("aliti", "al"), ("iviti", "ive"), ("biliti", "ble"),
+)
+STEP3 = (
+    ("icate", "ic"), ("ative", ""), ("alize", "al"), ("iciti", "ic"),
+    ("ical", "ic"), ("ful", ""), ("ness", ""),
+)
+STEP4 = (
+    "al", "ance", "ence", "er", "ic", "able", "ible", "ant", "ement", "ment",
+    "ent", "ion", "ou", "ism", "ate", "iti", "ous", "ive", "ize",
+)
+
+
+def _replace(w, rules, min_measure):
+    for suffix, replacement in rules:
+        if w.endswith(suffix):
+            stem = w[:-len(suffix)]
+            return stem + replacement if _measure(stem) > min_measure else w
+    return w
+
+
+def _step1(w):
+    # plurals and -ed / -ing
+    if w.endswith("sses") or w.endswith("ies"):
+        w = w[:-2]
+    elif w.endswith("s") and not w.endswith("ss"):
+        w = w[:-1]
+
+    if w.endswith("eed"):
+        if _measure(w[:-3]) > 0:
+            w = w[:-1]
+    else:
+        for suffix in ("ed", "ing"):
+            if w.endswith(suffix) and _has_vowel(w[:-len(suffix)]):
+                w = w[:-len(suffix)]
+                if w.endswith(("at", "bl", "iz")):
+                    w += "e"
+                elif _double_cons(w) and w[-1] not in "lsz":
+                    w = w[:-1]
+                elif _measure(w) == 1 and _cvc(w):
+                    w += "e"
+                break
+
+    if w.endswith("y") and _has_vowel(w[:-1]):
+        w = w[:-1] + "i"
+    return w
+
+
+def _step4(w):
+    for suffix in STEP4:
+        if w.endswith(suffix):
+            stem = w[:-len(suffix)]
+            if suffix == "ion" and not stem.endswith(("s", "t")):
+                continue
+            return stem if _measure(stem) > 1 else w
+    return w
+
+
+def _step5(w):
+    if w.endswith("e"):
+        m = _measure(w[:-1])
+        if m > 1 or (m == 1 and not _cvc(w[:-1])):
+            w = w[:-1]
+    if w.endswith("ll") and _measure(w) > 1:
+        w = w[:-1]
+    return w
+
+
+def stem(word):
+    """Porter stem of a lowercase word; words of up to two letters are kept."""
+    if len(word) <= 2:
+        return word
+    w = _step1(word)
+    w = _replace(w, STEP2, 0)
+    w = _replace(w, STEP3, 0)
+    w = _step4(w)
+    return _step5(w)
+
+
+class StemCache:
+    """stem() memoized in a table of at most maxsize surface forms."""
+
+    def __init__(self, maxsize, stemmer=stem):
+        self.maxsize = maxsize
+        self.stemmer = stemmer
+        self.table = {}
+
+    def __call__(self, word):
+        s = self.table.get(word)
+        if s is None:
+            s = self.stemmer(word)
+            if len(self.table) < self.maxsize:
+                self.table[word] = s
+        return s
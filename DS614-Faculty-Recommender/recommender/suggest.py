@@ -0,0 +1,120 @@
+"""
+Prefix autocomplete over faculty names, vocabulary terms and PHRASES.
+
+Every suggestion is reachable through one or more lowercase keys (a
+faculty name through the full name and through each later word of it, so
+"chh" finds "Rachit Chhaya"). The keys are kept in one sorted list; the
+keys starting with a prefix are one contiguous slice of it, found with
+two bisects. Suggestions are numbered in rank order (document frequency,
+then names before phrases before terms, then text), so the best of a
+slice are its smallest numbers. For the one- and two-letter prefixes,
+whose slices are the longest, the answer is computed up front.
+"""
+from bisect import bisect_left
+
+import numpy as np
+
+from recommender.preprocessing import PHRASES
+
+KINDS = ("name", "phrase", "term")
+
+# prefixes up to this length get their top suggestions precomputed
+PRECOMPUTED_PREFIX = 2
+MAX_LIMIT = 50
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+class Suggester:
+    """Top suggestions for a prefix, ranked by document frequency."""
+
+    def __init__(self, entries):
+        # entries: (text, kind, df); the same (text, kind) is kept once
+        seen = {}
+        for text, kind, df in entries:
+            key = (text, kind)
+            seen[key] = max(df, seen.get(key, 0))
+        order = sorted(seen.items(), key=lambda e: (-e[1], KINDS.index(e[0][1]), e[0][0]))
+        self.texts = [text for (text, _), _ in order]
+        self.kinds = [kind for (_, kind), _ in order]
+        self.dfs = [df for _, df in order]
+
+        keys = []
+        for rank, text in enumerate(self.texts):
+            key = normalize(text)
+            keys.append((key, rank))
+            if self.kinds[rank] == "name":
+                words = key.split()
+                keys.extend((" ".join(words[i:]), rank) for i in range(1, len(words)))
+        keys.sort()
+        self.keys = [k for k, _ in keys]
+        self.ranks = np.array([r for _, r in keys], dtype=np.int32)
+
+        self.top = {}
+        for n in range(1, PRECOMPUTED_PREFIX + 1):
+            for prefix in {k[:n] for k in self.keys if len(k) >= n}:
+                self.top[prefix] = self._best(prefix, MAX_LIMIT)
+
+    @classmethod
+    def from_index(cls, meta, doc_freqs, phrases=PHRASES):
+        """
+        Build from the index's metadata rows and {term: document frequency}.
+        Phrase tokens ("computer_vision") are shown with spaces.
+        """
+        entries = []
+        names = {}
+        for row in meta:
+            name = " ".join(str(row.get("name") or "").split())
+            if name:
+                names[name] = names.get(name, 0) + 1
+        entries.extend((name, "name", n) for name, n in names.items())
+        for phrase in phrases:
+            phrase = normalize(phrase)
+            entries.append((phrase, "phrase", doc_freqs.get(phrase.replace(" ", "_"), 0)))
+        phrase_set = {normalize(p) for p in phrases}
+        for term, df in doc_freqs.items():
+            text = term.replace("_", " ")
+            entries.append((text, "phrase" if text in phrase_set else "term", df))
+        return cls(entries)
+
+    def _range(self, prefix):
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def _best(self, prefix, limit):
+        lo, hi = self._range(prefix)
+        if lo == hi:
+            return []
+        # a name can sit under several keys of the slice
+        return np.unique(self.ranks[lo:hi])[:limit].tolist()
+
+    def suggest(self, prefix, limit=10):
+        """
+        [{"text", "kind", "df"}] of the best suggestions starting with
+        prefix. When nothing starts with a multi-word prefix, its last word
+        is completed instead ("graph neur" -> "graph neural ...").
+        """
+        prefix = normalize(prefix)
+        limit = max(0, min(limit, MAX_LIMIT))
+        if not prefix or not limit:
+            return []
+        ranks = self.top.get(prefix)
+        if ranks is None:
+            ranks = self._best(prefix, limit)
+        head = ""
+        if not ranks and " " in prefix:
+            head, last = prefix.rsplit(" ", 1)
+            ranks = self.top.get(last)
+            if ranks is None:
+                ranks = self._best(last, limit)
+            head += " "
+        return [
+            {"text": head + self.texts[r], "kind": self.kinds[r], "df": self.dfs[r]}
+            for r in ranks[:limit]
+        ]
+
+    def __len__(self):
+        return len(self.texts)
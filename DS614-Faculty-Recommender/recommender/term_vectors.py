@@ -0,0 +1,85 @@
+"""
+Compact document vectors over an integer term vocabulary.
+
+A TF-IDF dict repeats a pointer to the term string, a hash slot and a float
+object for every term of every document (~100 bytes per entry). Here each
+term is interned once in a Vocabulary and a document is two flat arrays,
+term ids (uint32, ascending) and weights, i.e. 12 bytes per entry with
+float64 weights or 8 with float32.
+"""
+import math
+from array import array
+
+# float64 keeps scores bitwise equal to the dict vectors; "f" (float32)
+# halves the weights at the cost of ~1e-7 relative error in the scores
+WEIGHT_TYPECODE = "d"
+
+
+class Vocabulary:
+    """Term <-> integer id. Ids follow the sorted order of the initial terms."""
+
+    __slots__ = ("terms", "ids")
+
+    def __init__(self, terms=()):
+        self.terms = sorted(set(terms))
+        self.ids = {w: i for i, w in enumerate(self.terms)}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, term):
+        return term in self.ids
+
+    def get(self, term, default=None):
+        return self.ids.get(term, default)
+
+    def add(self, term):
+        """Id of term, appending it to the vocabulary if it is new."""
+        t = self.ids.get(term)
+        if t is None:
+            t = self.ids[term] = len(self.terms)
+            self.terms.append(term)
+        return t
+
+
+class TermVector:
+    """Sparse vector as parallel arrays of ascending term ids and weights."""
+
+    __slots__ = ("ids", "weights")
+
+    def __init__(self, ids, weights):
+        self.ids = ids
+        self.weights = weights
+
+    def __reduce__(self):
+        # pickled as two arrays, without a per-object state dict
+        return TermVector, (self.ids, self.weights)
+
+    @classmethod
+    def from_dict(cls, vec, vocab, typecode=WEIGHT_TYPECODE, add=True):
+        """
+        Compact a {term: weight} dict. New terms are added to vocab, or
+        dropped when add is False (e.g. query terms that are not indexed).
+        """
+        if add:
+            pairs = sorted((vocab.add(w), x) for w, x in vec.items())
+        else:
+            pairs = sorted((vocab.ids[w], x) for w, x in vec.items() if w in vocab.ids)
+        return cls(array("I", [t for t, _ in pairs]), array(typecode, [x for _, x in pairs]))
+
+    def to_dict(self, vocab):
+        terms = vocab.terms
+        return {terms[t]: x for t, x in zip(self.ids, self.weights)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def items(self):
+        return zip(self.ids, self.weights)
+
+    def norm(self):
+        return math.sqrt(sum(x*x for x in self.weights))
+
+    def nbytes(self):
+        return self.ids.itemsize * len(self.ids) + self.weights.itemsize * len(self.weights)
+
@@ -0,0 +1,179 @@
+"""
+Disk cache of faculty photo thumbnails for the Streamlit UI.
+
+prefetch() downloads the photo of every profile ahead of time, many at
+once over one pooled session, and keeps a small copy under THUMBNAIL_DIR,
+one file per profile. The UI only reads those files and inlines them as
+data URIs, so rendering a result never waits on the network; a profile
+without a cached photo gets an initials avatar drawn locally.
+
+The photo URL is the one the Finder's spider stored with the profile
+(photo_url). Rows from an older crawl have none, and the job then looks
+for the photo on the profile page itself.
+"""
+import base64
+import hashlib
+import html
+import io
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urljoin
+
+from recommender.data_sources import make_session
+from recommender.similarity import profile_details
+from config.settings import THUMBNAIL_DIR, THUMBNAIL_SIZE
+
+try:
+    from PIL import Image
+except ImportError:  # optional: without Pillow photos are kept as downloaded
+    Image = None
+
+# leading bytes of the image formats a browser shows
+SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF8", "image/gif"),
+)
+
+AVATAR_BACKGROUND = "#6366f1"
+
+
+def media_type(data):
+    """MIME type of image bytes, None if they are not a JPEG, PNG, GIF or WebP."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, media in SIGNATURES:
+        if data.startswith(signature):
+            return media
+    return None
+
+
+def shrink(data, size=THUMBNAIL_SIZE):
+    """
+    JPEG of at most size pixels a side. The bytes are kept as they are
+    without Pillow, or when they are already small enough.
+    """
+    if Image is None:
+        return data
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            if max(im.size) <= size and media_type(data) == "image/jpeg":
+                return data
+            im.thumbnail((size, size))
+            out = io.BytesIO()
+            im.convert("RGB").save(out, "JPEG", quality=85, optimize=True)
+    except (OSError, ValueError):
+        return data
+    return out.getvalue()
+
+
+def initials_avatar(name):
+    """Data URI of an SVG with the initials of name, in place of a missing photo."""
+    initials = "".join(w[0] for w in name.split()[:2]).upper() or "?"
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="200" height="200">'
+        f'<rect width="100%" height="100%" fill="{AVATAR_BACKGROUND}"/>'
+        '<text x="50%" y="50%" dy=".35em" text-anchor="middle" fill="#fff" '
+        f'font-family="sans-serif" font-size="80" font-weight="bold">{html.escape(initials)}</text></svg>'
+    )
+    return "data:image/svg+xml;charset=utf-8," + quote(svg)
+
+
+class ThumbnailCache:
+    """Photos on disk, one file per profile, named by a hash of its profile URL."""
+
+    def __init__(self, directory=THUMBNAIL_DIR):
+        self.directory = directory
+
+    def key(self, profile_url, name=""):
+        return hashlib.sha1((profile_url or name).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key):
+        return os.path.exists(self.path(key))
+
+    def get(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, data):
+        # written aside and renamed, so a reader never sees half a photo
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{self.path(key)}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self.path(key))
+
+    def photo_src(self, name, profile_url):
+        """<img> src for a profile: its cached photo, or an initials avatar. Never fetches."""
+        data = self.get(self.key(profile_url, name))
+        media = media_type(data) if data else None
+        if media is None:
+            return initials_avatar(name)
+        return f"data:{media};base64,{base64.b64encode(data).decode()}"
+
+
+def photo_url_from_page(page, page_url):
+    """Photo URL found on a profile page, for rows scraped before photo_url was stored."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page, "html.parser")
+    img = (
+        soup.select_one("div[class*='field--name-field'][class*='image'] img")
+        or soup.select_one("div[class*='field--name-field'][class*='photo'] img")
+        or soup.find("img", class_="faculty-photo")
+        or soup.select_one(".profile-image img")
+        or soup.find("img", alt=lambda x: x and "photo" in x.lower())
+    )
+    if img and img.get("src"):
+        return urljoin(page_url, img["src"])
+    meta = soup.find("meta", property="og:image")
+    if meta and meta.get("content"):
+        return urljoin(page_url, meta["content"])
+    return None
+
+
+def fetch_photo(row, session, cache, refresh=False, timeout=10):
+    """
+    Download and store the photo of one metadata row. Returns "cached",
+    "fetched", "missing" (no photo to be found) or "failed".
+    """
+    name = row.get("name", "")
+    profile_url = profile_details(row)["profile_url"]
+    key = cache.key(profile_url, name)
+    if not refresh and key in cache:
+        return "cached"
+    try:
+        url = row.get("photo_url") or None
+        if url is None and profile_url:
+            page = session.get(profile_url, timeout=timeout)
+            if page.status_code == 200:
+                url = photo_url_from_page(page.content, profile_url)
+        if url is None:
+            return "missing"
+        response = session.get(url, timeout=timeout)
+        response.raise_for_status()
+    except Exception:
+        return "failed"
+    if media_type(response.content) is None:
+        return "failed"
+    cache.put(key, shrink(response.content))
+    return "fetched"
+
+
+def prefetch(rows, workers=8, refresh=False, cache=None, session=None, timeout=10):
+    """
+    Fill the cache with the photos of rows (the index's metadata rows),
+    workers downloads at a time. Returns a Counter of fetch_photo outcomes.
+    """
+    cache = cache or ThumbnailCache()
+    session = session or make_session(retries=2, pool_size=workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="photo-prefetch") as pool:
+        outcomes = pool.map(lambda row: fetch_photo(row, session, cache, refresh, timeout), rows)
+        return Counter(outcomes)
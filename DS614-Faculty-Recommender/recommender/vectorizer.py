@@ -6,15 +6,20 @@ def compute_tf(tokens):
     total = len(tokens)
     return {w: c[w]/total for w in c}
 
-def compute_idf(all_tokens):
-    N = len(all_tokens)
+def compute_df(all_tokens):
     df = {}
 
     for tokens in all_tokens:
         for w in set(tokens):
             df[w] = df.get(w, 0) + 1
 
-    return {w: math.log((N+1)/(df[w]+1)) + 1 for w in df}
+    return df
+
+def idf_from_df(df, N):
+    return {w: math.log((N+1)/(df[w]+1)) + 1 for w in df if df[w] > 0}
+
+def compute_idf(all_tokens):
+    return idf_from_df(compute_df(all_tokens), len(all_tokens))
 
 def compute_tfidf(tf, idf):
     return {w: tf[w]*idf.get(w, 0) for w in tf}
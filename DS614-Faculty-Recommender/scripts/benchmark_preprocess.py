@@ -0,0 +1,89 @@
+"""
+Compare preprocess() with the str.replace implementation it replaced.
+
+Checks that both produce the same tokens for every indexed document, then
+times them with the built-in phrase list and with larger synthetic phrase
+dictionaries:
+
+    python scripts/benchmark_preprocess.py --phrases 0 100 500 --repeat 5
+"""
+import sys
+import os
+import re
+import random
+import argparse
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from recommender.preprocessing import PHRASES, STOPWORDS, PhraseTokenizer
+from recommender.data_sources import iter_csv
+from recommender.field_index import FIELDS
+
+
+def legacy_preprocess(text, phrases=PHRASES):
+    # preprocess() before the compiled tokenizer: one str.replace per phrase
+    text = text.lower()
+    for p in phrases:
+        text = text.replace(p, p.replace(" ", "_"))
+    text = re.sub(r'[^a-z_ ]', ' ', text.lower())
+    tokens = text.split()
+    return [t for t in tokens if t not in STOPWORDS and len(t) > 2]
+
+
+def synthetic_phrases(docs, n, seed=0):
+    """
+    PHRASES plus up to n two- and three-word phrases taken from the corpus,
+    so they do match. No word is used twice, so the phrases do not overlap
+    and both implementations must agree.
+    """
+    rng = random.Random(seed)
+    used = set(" ".join(PHRASES).split())
+    words = [re.findall(r"[a-z]{4,}", d.lower()) for d in docs]
+    words = [ws for ws in words if len(ws) >= 3]
+    phrases = []
+    for _ in range(50 * n):
+        if len(phrases) >= n:
+            break
+        ws = rng.choice(words)
+        i = rng.randrange(len(ws) - 2)
+        candidate = ws[i:i + rng.choice((2, 3))]
+        if len(set(candidate)) == len(candidate) and not used.intersection(candidate):
+            used.update(candidate)
+            phrases.append(" ".join(candidate))
+    return list(PHRASES) + phrases
+
+
+def best_of(fn, docs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for d in docs:
+            fn(d)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark preprocess against the legacy implementation")
+    parser.add_argument("--phrases", type=int, nargs="+", default=[0, 100, 500, 2000],
+                        help="extra synthetic phrases on top of PHRASES (default: 0 100 500 2000)")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs, best one is reported")
+    parser.add_argument("--csv", default=None, help="CSV whose documents are tokenised (default: the Finder's)")
+    args = parser.parse_args()
+
+    rows = iter_csv(args.csv) if args.csv else iter_csv()
+    docs = [" ".join(str(row.get(f, "")) for f in FIELDS) for row in rows]
+    chars = sum(map(len, docs))
+    print(f"{len(docs)} documents, {chars / 1e6:.2f}M characters")
+
+    print(f"{'phrases':>8} {'legacy ms':>10} {'compiled ms':>12} {'speedup':>8}  identical")
+    for extra in args.phrases:
+        phrases = synthetic_phrases(docs, extra)
+        tokenizer = PhraseTokenizer(phrases)
+
+        identical = all(tokenizer.tokenize(d) == legacy_preprocess(d, phrases) for d in docs)
+        legacy = best_of(lambda d: legacy_preprocess(d, phrases), docs, args.repeat)
+        compiled = best_of(tokenizer.tokenize, docs, args.repeat)
+        print(f"{len(phrases):>8} {legacy * 1e3:>10.1f} {compiled * 1e3:>12.1f} "
+              f"{legacy / compiled:>7.1f}x  {identical}")
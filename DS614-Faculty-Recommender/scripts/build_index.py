@@ -1,9 +1,67 @@
 import sys
 import os
+import argparse
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from recommender.index_builder import build_index
+from recommender.index_builder import build_index, build_index_parallel
+from recommender.data_sources import SOURCES
+from recommender.semantic import parse_components
+from config.settings import INDEX_SOURCE, LSA_COMPONENTS
+
+FORMATS = {
+    "pickle": ("pickle",),
+    "mmap": ("mmap",),
+    "both": ("pickle", "mmap"),
+}
 
 if __name__ == "__main__":
-    build_index()
+    parser = argparse.ArgumentParser(description="Build the faculty search index")
+    parser.add_argument(
+        "--format", choices=FORMATS, default="both",
+        help="index/vectors.pkl, index/index.bin, or both (default) while migrating"
+    )
+    parser.add_argument(
+        "--parallel", action="store_true",
+        help="stream the source in chunks and tokenise them in a process pool"
+    )
+    parser.add_argument(
+        "--source", choices=SOURCES, default=INDEX_SOURCE,
+        help=f"where the faculty rows come from (default: {INDEX_SOURCE})"
+    )
+    parser.add_argument(
+        "--lsa", action="store_true",
+        help="also fit the LSA model used by the lsa and hybrid backends"
+    )
+    parser.add_argument(
+        "--lsa-components", type=parse_components, default=parse_components(LSA_COMPONENTS),
+        help=f"LSA dimensions, or auto for min(100, documents / 2) (default: {LSA_COMPONENTS})"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows per chunk")
+    parser.add_argument("--path", default=None, help="CSV file or SQLite database to read (csv/sqlite sources)")
+    parser.add_argument("--url", default=None, help="Finder /faculty endpoint to page through (api source)")
+    parser.add_argument("--page-size", type=int, default=None, help="rows per API request (api source)")
+    args = parser.parse_args()
+
+    source_options = {}
+    if args.path:
+        source_options["path"] = args.path
+    if args.url:
+        source_options["url"] = args.url
+    if args.page_size:
+        source_options["page_size"] = args.page_size
+
+    lsa_components = args.lsa_components if args.lsa else 0
+
+    if args.parallel:
+        build_index_parallel(
+            chunk_size=args.chunk_size, workers=args.workers,
+            formats=FORMATS[args.format], source=args.source,
+            lsa_components=lsa_components, **source_options,
+        )
+    else:
+        build_index(
+            formats=FORMATS[args.format], source=args.source,
+            lsa_components=lsa_components, **source_options,
+        )
@@ -0,0 +1,87 @@
+"""
+What the lsa and hybrid backends add to the lexical ranking, per number of
+LSA dimensions.
+
+The served index is loaded once and an LSA model of each size is fitted
+in memory (nothing under INDEX_DIR is written). Typo correction is turned
+off and every query must be in the vocabulary, so a result that shares no
+term with the query can only come from LSA:
+
+    python scripts/lsa_report.py                       # auto, 20, 54, 80, 107
+    python scripts/lsa_report.py --components 20 auto --show
+
+"added" counts results in the top N that contain no query term and
+"dropped" the lexical matches they pushed out of it. --show lists the
+added profiles, so their relevance can be judged by hand.
+"""
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# before the engine is imported: a corrected token would be a lexical match
+# for another word
+os.environ["SPELL_MAX_DISTANCE"] = "0"
+os.environ["INDEX_RELOAD_INTERVAL"] = "0"
+
+from recommender.semantic import LsaModel, parse_components, auto_components
+
+QUERIES = (
+    "deep learning", "neural networks", "image processing", "cryptography", "wireless communication",
+    "robotics", "optimization", "natural language processing", "quantum", "signal processing",
+    "computer vision", "information retrieval", "vlsi", "graph theory", "databases",
+)
+
+
+def lexical_matches(index, tokens):
+    return {d for t in tokens for d in index.postings[t][0]}
+
+
+def compare(engine, queries, top, show):
+    index = engine.INDEX
+    position = {row.get("faculty_id"): d for d, row in enumerate(index.meta)}
+    totals = {"lexical": 0, "lsa_added": 0, "lsa_dropped": 0, "hybrid_added": 0, "hybrid_dropped": 0}
+    for q in queries:
+        tokens, _, _ = engine.analyze_query(q)
+        missing = [t for t in tokens if t not in index.idf]
+        if missing:
+            raise SystemExit(f"{q!r}: {', '.join(missing)} not in the vocabulary")
+        lexical = lexical_matches(index, tokens)
+        baseline = engine.search(f"top {top} {q}", backend="postings")
+        totals["lexical"] += len(baseline)
+        for backend in ("lsa", "hybrid"):
+            results = engine.search(f"top {top} {q}", backend=backend)
+            added = [r for r in results if position[r["faculty_id"]] not in lexical]
+            totals[f"{backend}_added"] += len(added)
+            totals[f"{backend}_dropped"] += len(baseline) - (len(results) - len(added))
+            if show and backend == "lsa":
+                for r in added:
+                    row = index.meta[position[r["faculty_id"]]]
+                    print(f"  {q:<28} {r['score']:.3f}  {row.get('name', '')[:24]:<24} {str(row.get('specialization', ''))[:70]}")
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Non-lexical results of the lsa and hybrid backends per LSA size")
+    parser.add_argument("--components", nargs="+", type=parse_components, default=["auto", 20, 54, 80, 107])
+    parser.add_argument("--top", type=int, default=5, help="results per query (default: 5, as /recommend)")
+    parser.add_argument("--show", action="store_true", help="list the profiles lsa adds")
+    args = parser.parse_args()
+
+    from app import engine
+
+    index = engine.INDEX
+    vocab, matrix = index.matrix
+    print(f"{len(index.meta)} documents, {len(QUERIES)} queries, top {args.top}; auto = {auto_components(len(index.meta))}")
+    print(f"{'dimensions':<12}{'lexical':>9}{'lsa added':>11}{'dropped':>9}{'hybrid added':>14}{'dropped':>9}")
+    for k in args.components:
+        index._lsa = LsaModel.fit(matrix, vocab, k)
+        engine.CACHE.clear()
+        if args.show:
+            print(f"{k}:")
+        t = compare(engine, QUERIES, args.top, args.show)
+        print(
+            f"{str(k):<12}{t['lexical']:>9}{t['lsa_added']:>11}{t['lsa_dropped']:>9}"
+            f"{t['hybrid_added']:>14}{t['hybrid_dropped']:>9}"
+        )
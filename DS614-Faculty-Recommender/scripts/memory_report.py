@@ -0,0 +1,135 @@
+"""
+Memory used by document vectors as {term: weight} dicts versus TermVectors.
+
+Every mode runs in a fresh process that generates the same synthetic corpus
+(document lengths and term distribution modelled on the built index, the
+vocabulary grown with the corpus size) and reports how much its RSS grew:
+
+    dict            documents as {term: weight} dicts
+    compact         TermVectors with float64 weights
+    compact-f32     TermVectors with float32 weights
+    index-dict      dict vectors, (doc_id, weight) tuple postings and norms,
+                    i.e. what SearchIndex held before
+    index-compact   SearchIndex as loaded now: TermVectors, array postings, norms
+
+    python scripts/memory_report.py --docs 20000
+"""
+import sys
+import os
+import argparse
+import gc
+import json
+import math
+import pickle
+import random
+import subprocess
+from array import array
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config.settings import INDEX_FILE
+from recommender.inverted_index import compute_norms
+from recommender.search_index import SearchIndex
+from recommender.term_vectors import Vocabulary, TermVector
+
+MODES = ("dict", "compact", "compact-f32", "index-dict", "index-compact")
+
+
+def rss_mb():
+    # current resident set size (Linux)
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def synthetic_corpus(n_docs, seed=0):
+    """
+    (terms, generator of n_docs TF-IDF dicts) shaped like the documents of
+    the built index.
+    """
+    with open(INDEX_FILE, "rb") as f:
+        vectors, _, idf = pickle.load(f)[:3]
+    lengths = [len(v) for v in vectors if v]
+
+    # Heaps' law: the vocabulary grows with the square root of the corpus
+    n_terms = int(len(idf) * math.sqrt(max(n_docs / len(vectors), 1)))
+    terms = sorted(idf, key=idf.get) + [f"term{i:07d}" for i in range(n_terms - len(idf))]
+    cum_weights = []
+    total = 0
+    for rank in range(1, len(terms) + 1):
+        total += 1 / rank
+        cum_weights.append(total)
+
+    def docs():
+        rng = random.Random(seed)
+        for _ in range(n_docs):
+            doc = rng.choices(terms, cum_weights=cum_weights, k=rng.choice(lengths))
+            yield {w: rng.random() for w in doc}
+
+    return terms, docs()
+
+
+def measure(mode, n_docs):
+    terms, docs = synthetic_corpus(n_docs)
+    # the vocabulary and IDF exist either way; only the vectors are measured
+    idf = dict.fromkeys(terms, 1.0)
+    vocab = Vocabulary(idf)
+    typecode = "f" if mode == "compact-f32" else "d"
+    gc.collect()
+    before = rss_mb()
+
+    vectors = []
+    postings = {}
+    entries = 0
+    for doc_id, vec in enumerate(docs):
+        entries += len(vec)
+        if mode == "index-dict":
+            for w, x in vec.items():
+                postings.setdefault(w, []).append((doc_id, x))
+        elif mode == "index-compact":
+            for w, x in vec.items():
+                plist = postings.setdefault(w, (array("I"), array("d")))
+                plist[0].append(doc_id)
+                plist[1].append(x)
+        if mode in ("dict", "index-dict"):
+            vectors.append(vec)
+        else:
+            vectors.append(TermVector.from_dict(vec, vocab, typecode))
+
+    if mode == "index-dict":
+        index = vectors, postings, compute_norms(vectors)
+    elif mode == "index-compact":
+        index = SearchIndex(vectors, None, idf, postings, [v.norm() for v in vectors])
+
+    gc.collect()
+    return {"mode": mode, "docs": n_docs, "entries": entries, "rss_mb": round(rss_mb() - before, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RSS of dict vs compact document vectors")
+    parser.add_argument("--docs", type=int, default=20000, help="synthetic documents (default 20000)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.docs)))
+        sys.exit()
+
+    results = []
+    for mode in args.modes:
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--docs", str(args.docs)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"{'mode':<14} {'docs':>8} {'entries':>10} {'RSS MiB':>9} {'bytes/entry':>12}")
+    for r in results:
+        print(f"{r['mode']:<14} {r['docs']:>8} {r['entries']:>10} {r['rss_mb']:>9} "
+              f"{r['rss_mb'] * 2**20 / r['entries']:>12.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
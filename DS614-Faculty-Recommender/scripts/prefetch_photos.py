@@ -0,0 +1,35 @@
+"""
+Download the photo of every profile in the served index into the
+thumbnail cache the Streamlit UI reads (THUMBNAIL_DIR):
+
+    python scripts/prefetch_photos.py --workers 16
+
+Photos already cached are skipped unless --refresh is given.
+"""
+import sys
+import os
+import argparse
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender.search_index import load_search_index
+from recommender.thumbnails import ThumbnailCache, prefetch
+from config.settings import THUMBNAIL_DIR
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prefetch faculty photos into the thumbnail cache")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent downloads")
+    parser.add_argument("--refresh", action="store_true", help="download photos that are already cached again")
+    parser.add_argument("--timeout", type=float, default=10, help="seconds per HTTP request")
+    parser.add_argument("--dir", default=str(THUMBNAIL_DIR), help=f"cache directory (default: {THUMBNAIL_DIR})")
+    args = parser.parse_args()
+
+    meta = load_search_index().meta
+    start = time.perf_counter()
+    outcomes = prefetch(
+        meta, workers=args.workers, refresh=args.refresh,
+        cache=ThumbnailCache(args.dir), timeout=args.timeout,
+    )
+    summary = ", ".join(f"{n} {outcome}" for outcome, n in sorted(outcomes.items()))
+    print(f"{len(meta)} profiles in {time.perf_counter() - start:.1f}s: {summary}")
@@ -0,0 +1,117 @@
+"""
+Serve the recommender API from several worker processes sharing one index.
+
+`uvicorn --workers N` starts N fresh interpreters, and each of them loads its
+own copy of the index. Here the parent process imports the app, which loads
+the index (app.engine), builds what the search backend needs, moves every
+loaded object out of the garbage collector's reach (gc.freeze, so collections
+in the workers do not write to their pages) and only then forks the workers.
+The workers start with the parent's memory, shared copy-on-write, and accept
+connections on the socket the parent bound.
+
+With INDEX_FORMAT=mmap the postings, weights and norms are views into the
+mapped file, so they stay shared after a hot reload too: every worker maps
+the new file, whose pages are in the OS page cache once. A pickle index is
+shared until a worker reloads it.
+
+    INDEX_FORMAT=mmap python scripts/serve.py --workers 8 --port 8001
+
+Needs os.fork (Linux / macOS).
+"""
+import sys
+import os
+import argparse
+import gc
+import logging
+import signal
+import socket
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+logger = logging.getLogger("serve")
+
+
+def bind(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, log_level):
+    import uvicorn
+
+    # uvicorn installs its own handlers for a graceful shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+
+
+def serve(workers, host, port, backend=None, log_level="info"):
+    from app.api.main import app
+    from app import engine
+
+    # everything the workers need is built here, before the fork
+    engine.INDEX.warm(backend)
+    gc.collect()
+    gc.freeze()
+
+    sock = bind(host, port)
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(app, sock, log_level)
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+    logger.info("Serving on http://%s:%d with %d workers (index %s)", host, port, workers, engine.INDEX.path)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            # keep the pool at size; the new worker starts from the parent's index
+            logger.warning("Worker %d exited (status %d), starting a new one", pid, status)
+            spawn()
+
+
+if __name__ == "__main__":
+    from config.settings import SEARCH_BACKEND
+
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers sharing one index")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: all cores)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument(
+        "--backend", default=SEARCH_BACKEND,
+        help=f"search backend to build before forking (default: {SEARCH_BACKEND})"
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    serve(args.workers, args.host, args.port, args.backend, args.log_level)
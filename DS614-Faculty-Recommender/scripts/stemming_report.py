@@ -0,0 +1,132 @@
+"""
+Vocabulary size, index size and query latency with and without stemming.
+
+Each mode builds the index from the same CSV into its own scratch
+INDEX_DIR, in a fresh process (STEMMING is read when preprocessing is
+imported), and then times engine.search on the benchmark queries with the
+result cache cleared:
+
+    python scripts/stemming_report.py                 # the Finder's CSV
+    python scripts/stemming_report.py --rows 20000    # a synthetic corpus
+
+"matched" is the mean number of documents sharing a term with a query:
+stemming lets "networks" find profiles that only say "networking".
+"""
+import sys
+import os
+import argparse
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.run import QUERIES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = {"surface": "0", "stemmed": "1"}
+
+# surface forms the stemmer folds together, on top of the benchmark queries
+EXTRA_QUERIES = (
+    "networks", "networking security", "optimization algorithms", "computing systems",
+    "learning representations", "embedded systems designs", "communications", "analysing images",
+)
+
+
+def measure(csv_path, repeats):
+    """Build the index from csv_path and measure it; INDEX_DIR and STEMMING are already set."""
+    from recommender.index_builder import build_index
+    from config.settings import INDEX_FILE, MMAP_INDEX_FILE
+
+    start = time.perf_counter()
+    build_index(source="csv", path=csv_path)
+    build_s = time.perf_counter() - start
+
+    from app import engine
+    from recommender.inverted_index import score_postings
+
+    index = engine.INDEX
+    queries = list(QUERIES) + list(EXTRA_QUERIES)
+    matched = []
+    for q in queries:
+        q_vec, _ = engine.query_vector(q)
+        matched.append(len(score_postings(q_vec, index.postings, index.norms)) if q_vec else 0)
+
+    seconds = []
+    for _ in range(repeats):
+        for q in queries:
+            engine.CACHE.clear()
+            t = time.perf_counter()
+            engine.search(q)
+            seconds.append(time.perf_counter() - t)
+    ms = np.asarray(seconds) * 1000
+
+    return {
+        "documents": len(index.meta),
+        "terms": len(index.idf),
+        "postings": sum(len(ids) for ids, _ in index.postings.values()),
+        "pickle_kb": round(os.path.getsize(INDEX_FILE) / 1024, 1),
+        "mmap_kb": round(os.path.getsize(MMAP_INDEX_FILE) / 1024, 1),
+        "build_s": round(build_s, 2),
+        "matched": round(float(np.mean(matched)), 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+    }
+
+
+def run_mode(stemming, csv_path, repeats):
+    scratch = tempfile.mkdtemp(prefix="faculty-stemming-")
+    try:
+        env = {
+            **os.environ, "STEMMING": stemming, "INDEX_DIR": scratch,
+            "INDEX_FORMAT": "pickle", "INDEX_RELOAD_INTERVAL": "0",
+        }
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", csv_path, "--repeats", str(repeats)]
+        out = subprocess.run(cmd, cwd=ROOT, env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+        return json.loads(out.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index and query cost with and without stemming")
+    parser.add_argument("--rows", type=int, default=0, help="synthetic corpus size (default: the real CSV)")
+    parser.add_argument("--repeats", type=int, default=20, help="passes over the queries")
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    parser.add_argument("--child", metavar="CSV", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # the build prints progress; only the result line goes to stdout
+        real_stdout = sys.stdout
+        sys.stdout = sys.stderr
+        print(json.dumps(measure(args.child, args.repeats)), file=real_stdout)
+        sys.exit()
+
+    from config.settings import FACULTY_CSV_PATH
+
+    scratch = None
+    csv_path = str(FACULTY_CSV_PATH)
+    if args.rows:
+        from benchmarks.synthetic import write_csv
+        scratch = tempfile.mkdtemp(prefix="faculty-stemming-csv-")
+        csv_path = write_csv(os.path.join(scratch, "faculty.csv"), args.rows)
+    try:
+        results = {mode: run_mode(flag, csv_path, args.repeats) for mode, flag in MODES.items()}
+    finally:
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    keys = list(results["surface"])
+    print(f"{'':<12}" + "".join(f"{m:>12}" for m in results) + f"{'change':>10}")
+    for key in keys:
+        before, after = results["surface"][key], results["stemmed"][key]
+        change = f"{(after - before) / before:+.0%}" if before else ""
+        print(f"{key:<12}" + "".join(f"{r[key]:>12}" for r in results.values()) + f"{change:>10}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,137 @@
+"""
+Memory of the API served by 1 vs N workers: `uvicorn --workers` (every
+worker loads its own index) against scripts/serve.py (pre-forked workers
+sharing the parent's index).
+
+Each server is started on a free port, sent a round of queries so every
+worker has searched, and then measured over all of its processes from
+/proc/<pid>/smaps_rollup (Linux):
+
+    RSS   resident pages, counting shared pages once per process
+    PSS   shared pages split between the processes sharing them, so the
+          sum over processes is what the server really occupies
+    USS   pages private to a process
+
+    INDEX_FORMAT=mmap python scripts/worker_memory.py --workers 1 8
+    INDEX_DIR=/tmp/big-index python scripts/worker_memory.py --json memory.json
+"""
+import sys
+import os
+import argparse
+import json
+import signal
+import socket
+import subprocess
+import time
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ("uvicorn", "prefork")
+QUERIES = ("machine learning", "wireless communication", "vlsi design", "computer vision", "cryptography")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def command(mode, workers, port):
+    if mode == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "app.api.main:app", "--host", "127.0.0.1",
+                "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return [sys.executable, "scripts/serve.py", "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning"]
+
+
+def descendants(pid):
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # the command name may contain spaces; the ppid follows its closing parenthesis
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except OSError:
+                pass
+    found = [pid]
+    for p in found:
+        found.extend(c for c, ppid in parents.items() if ppid == p)
+    return found
+
+
+def memory_kb(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[name] = int(value.split()[0])
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def wait_ready(port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/admin/index", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"server on port {port} did not start within {timeout}s")
+
+
+def measure(mode, workers, requests_per_worker=20, timeout=300):
+    port = free_port()
+    env = {**os.environ, "INDEX_RELOAD_INTERVAL": "0"}
+    proc = subprocess.Popen(command(mode, workers, port), cwd=ROOT, env=env)
+    try:
+        wait_ready(port, timeout)
+        for i in range(requests_per_worker * workers):
+            q = urllib.parse.quote(f"{QUERIES[i % len(QUERIES)]} top {5 + i % 7}")
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/recommend?q={q}", timeout=30).read()
+        time.sleep(1)
+
+        pids = descendants(proc.pid)
+        total = {"rss": 0, "pss": 0, "uss": 0}
+        for pid in pids:
+            try:
+                for k, v in memory_kb(pid).items():
+                    total[k] += v
+            except OSError:
+                pass
+        return {
+            "mode": mode, "workers": workers, "processes": len(pids),
+            **{f"{k}_mb": round(v / 1024, 1) for k, v in total.items()},
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RSS / PSS of the API with 1 vs N workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = [measure(mode, n) for mode in args.modes for n in args.workers]
+
+    print(f"{'mode':<9} {'workers':>7} {'procs':>6} {'RSS MiB':>9} {'PSS MiB':>9} {'USS MiB':>9}")
+    for r in results:
+        print(f"{r['mode']:<9} {r['workers']:>7} {r['processes']:>6} {r['rss_mb']:>9} {r['pss_mb']:>9} {r['uss_mb']:>9}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
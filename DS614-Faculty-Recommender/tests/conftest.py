@@ -0,0 +1,82 @@
+"""
+Shared fixtures: one index built from the Finder's bundled CSV into a
+scratch INDEX_DIR, so the tests never touch index/.
+
+config.settings reads the environment when it is first imported, so the
+scratch directory is set here, before any test module imports it.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# preprocessing reads data/stopwords.txt relative to the working directory,
+# like the scripts, which are run from the project root
+os.chdir(ROOT)
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="recommender-tests-")
+os.environ["INDEX_DIR"] = SCRATCH_DIR
+os.environ["INDEX_RELOAD_INTERVAL"] = "0"
+for name in ("INDEX_FORMAT", "SEARCH_BACKEND", "STEMMING", "PHRASES_FILE", "SPELL_MAX_DISTANCE", "SPELL_WORDS_FILE"):
+    os.environ.pop(name, None)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+
+QUERIES = (
+    "machine learning", "wireless communication networks", "vlsi design", "computer vision",
+    "cryptography and security", "natural language processing", "signal processing",
+    "internet of things sensors", "quantum computing", "data mining", "graph theory algorithms",
+    "deep learning for medical image analysis and segmentation",
+)
+
+
+@pytest.fixture(scope="session")
+def rows():
+    from recommender.data_sources import iter_csv
+
+    return list(iter_csv())
+
+
+@pytest.fixture(scope="session")
+def built_index(rows):
+    """(pickle path, mmap path) of the bundled CSV's index, built once."""
+    from recommender.index_builder import build_index
+    from config.settings import INDEX_FILE, MMAP_INDEX_FILE
+
+    build_index(formats=("pickle", "mmap"), source="csv")
+    return INDEX_FILE, MMAP_INDEX_FILE
+
+
+@pytest.fixture(scope="session")
+def pickle_index(built_index):
+    from recommender.search_index import load_search_index
+
+    return load_search_index(built_index[0])
+
+
+@pytest.fixture(scope="session")
+def mmap_index(built_index):
+    from recommender.search_index import load_search_index
+
+    return load_search_index(built_index[1])
+
+
+def query_vectors(index, queries=QUERIES):
+    from recommender.preprocessing import preprocess
+
+    return [index.query_vector(preprocess(q)) for q in queries]
+
+
+def assert_same_ranking(got, expected, tol=1e-9):
+    """Same documents in the same order, with scores equal up to rounding."""
+    assert [d for d, _ in got] == [d for d, _ in expected]
+    for (_, a), (_, b) in zip(got, expected):
+        assert a == pytest.approx(b, rel=tol, abs=tol)
@@ -0,0 +1,58 @@
+"""The cosine backends, the batch path and filtered ranking agree on every query."""
+import pytest
+
+from conftest import QUERIES, assert_same_ranking, query_vectors
+from recommender.filters import SearchFilter
+
+COSINE_BACKENDS = ("postings", "maxscore", "sparse")
+
+
+@pytest.fixture(params=["pickle", "mmap"])
+def index(request, pickle_index, mmap_index):
+    return pickle_index if request.param == "pickle" else mmap_index
+
+
+@pytest.mark.parametrize("backend", COSINE_BACKENDS[1:])
+@pytest.mark.parametrize("k", [1, 5, 20])
+def test_backends_rank_like_postings(index, backend, k):
+    for q_vec in query_vectors(index):
+        expected = index.rank(q_vec, k, "postings")
+        assert expected, "every test query matches something"
+        assert_same_ranking(index.rank(q_vec, k, backend), expected)
+
+
+def test_pickle_and_mmap_rank_alike(pickle_index, mmap_index):
+    for a, b in zip(query_vectors(pickle_index), query_vectors(mmap_index)):
+        for backend in COSINE_BACKENDS:
+            assert_same_ranking(mmap_index.rank(b, 10, backend), pickle_index.rank(a, 10, backend))
+
+
+@pytest.mark.parametrize("backend", COSINE_BACKENDS)
+def test_batch_ranks_like_single_queries(index, backend):
+    q_vecs = query_vectors(index)
+    ks = [(3, 5, 10)[i % 3] for i in range(len(q_vecs))]
+    for got, q_vec, k in zip(index.rank_batch(q_vecs, ks, backend), q_vecs, ks):
+        assert_same_ranking(got, index.rank(q_vec, k, "postings"))
+
+
+@pytest.mark.parametrize("backend", COSINE_BACKENDS)
+def test_filtered_ranking_is_the_unfiltered_one_restricted(index, backend):
+    search_filter = SearchFilter(category=("adjunct-faculty",))
+    candidates = index.filters.select(search_filter)
+    assert candidates, "the bundled data has adjunct faculty"
+    allowed = set(candidates.ids.tolist())
+    for q_vec in query_vectors(index):
+        everything = index.rank(q_vec, len(index.meta), "postings")
+        expected = [(d, s) for d, s in everything if d in allowed][:5]
+        assert_same_ranking(index.rank(q_vec, 5, backend, candidates=candidates), expected)
+
+
+def test_empty_query_matches_nothing(index):
+    for backend in COSINE_BACKENDS:
+        assert index.rank({}, 5, backend) == []
+
+
+def test_unknown_backend_is_rejected(index):
+    q_vec = query_vectors(index, QUERIES[:1])[0]
+    with pytest.raises(ValueError):
+        index.rank(q_vec, 5, "nope")
@@ -0,0 +1,116 @@
+"""Single-profile upserts and deletes end where a full rebuild of the same rows does."""
+import pandas as pd
+import pytest
+
+from conftest import assert_same_ranking, query_vectors
+from recommender import index_builder
+from recommender.field_index import FieldIndex
+from recommender.incremental import IncrementalIndex
+from recommender.search_index import SearchIndex
+
+CHANGED = {"research": "quantum computing, quantum cryptography and graph theory algorithms"}
+NEW_ROW = {
+    "faculty_id": "TEST001",
+    "name": "Test Faculty",
+    "phd_field": "PhD (Computer Science)",
+    "mail": "test_faculty@example.org",
+    "bio": "works on deep learning for medical image analysis and segmentation",
+    "specialization": "['computer vision', 'machine learning']",
+    "research": "medical image segmentation",
+    "publications": "",
+    "profile_url": "",
+    "combined_text": "",
+}
+
+
+@pytest.fixture(scope="module")
+def edits(rows):
+    """(rows after the edits, the edits applied one by one to the state of the original rows)."""
+    changed = dict(rows[3], **CHANGED)
+    deleted = rows[10]["faculty_id"]
+    final = [changed if r is rows[3] else r for r in rows if r["faculty_id"] != deleted] + [NEW_ROW]
+
+    state = IncrementalIndex.from_rows(rows)
+    state.upsert(changed)
+    state.upsert(NEW_ROW)
+    assert state.delete(deleted)
+    assert not state.delete(deleted)
+    return final, state
+
+
+@pytest.fixture(scope="module")
+def rebuilt(edits, tmp_path_factory):
+    """Directory of a full build_index run over the edited rows, written as CSV."""
+    final, _ = edits
+    tmp = tmp_path_factory.mktemp("rebuild")
+    pd.DataFrame(final).to_csv(tmp / "faculty.csv", index=False)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(index_builder, "INDEX_FILE", tmp / "vectors.pkl")
+        mp.setattr(index_builder, "FIELD_INDEX_FILE", tmp / "fields.pkl")
+        mp.setattr(index_builder, "LSA_FILE", tmp / "lsa.npz")
+        index_builder.build_index(formats=("pickle",), source="csv", path=tmp / "faculty.csv")
+    return tmp
+
+
+def assert_same_index(got, expected):
+    assert [r["faculty_id"] for r in got.meta] == [r["faculty_id"] for r in expected.meta]
+    assert got.idf.keys() == expected.idf.keys()
+    assert got.idf == pytest.approx(expected.idf)
+    for a, b in zip(got.document_vectors(), expected.document_vectors()):
+        assert a == pytest.approx(b)
+    for a, b in zip(query_vectors(got), query_vectors(expected)):
+        assert_same_ranking(got.rank(a, 10, "postings"), expected.rank(b, 10, "postings"))
+
+
+def test_from_rows_is_a_full_build(rows, pickle_index):
+    assert_same_index(IncrementalIndex.from_rows(rows).to_search_index(), pickle_index)
+
+
+def test_from_search_index_recovers_the_counts(rows, pickle_index):
+    state = IncrementalIndex.from_search_index(pickle_index)
+    assert state.df == IncrementalIndex.from_rows(rows).df
+    assert_same_index(state.to_search_index(), pickle_index)
+
+
+def test_edits_match_a_rebuild(edits, rebuilt):
+    final, state = edits
+    assert len(state) == len(final)
+    assert "TEST001" in state
+    assert state.df == IncrementalIndex.from_rows(final).df
+    assert_same_index(state.to_search_index(), SearchIndex.load(rebuilt / "vectors.pkl"))
+
+
+def test_update_keeps_the_position(rows, edits):
+    _, state = edits
+    ids = list(state.docs)
+    assert ids.index(rows[3]["faculty_id"]) == 3
+    assert ids[-1] == "TEST001"
+
+
+def test_edits_match_the_rebuilt_field_index(edits, rebuilt):
+    _, state = edits
+    fields = state.to_search_index().fields
+    assert fields.document_counts() == FieldIndex.load(rebuilt / "fields.pkl").document_counts()
+
+
+def test_delete_then_readd_restores_the_state(rows):
+    state = IncrementalIndex.from_rows(rows)
+    df = dict(state.df)
+    removed = rows[0]
+    state.delete(removed["faculty_id"])
+    assert removed["faculty_id"] not in state
+    state.upsert(removed)
+    assert state.df == df
+
+
+def test_upsert_needs_an_id():
+    with pytest.raises(ValueError):
+        IncrementalIndex().upsert({"name": "No Id"})
+
+
+def test_state_round_trips(edits, tmp_path):
+    _, state = edits
+    state.save(tmp_path / "incremental.pkl")
+    loaded = IncrementalIndex.load(tmp_path / "incremental.pkl")
+    assert loaded.docs == state.docs
+    assert loaded.df == state.df
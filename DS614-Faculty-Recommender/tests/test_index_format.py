@@ -0,0 +1,44 @@
+"""The binary mmap index reads back what the pickle index holds."""
+import pytest
+
+from recommender.search_index import MappedSearchIndex, SearchIndex
+
+
+def test_loaders_pick_the_format(pickle_index, mmap_index):
+    assert type(pickle_index) is SearchIndex
+    assert isinstance(mmap_index, MappedSearchIndex)
+
+
+def test_meta_round_trips(pickle_index, mmap_index):
+    assert len(mmap_index.meta) == len(pickle_index.meta)
+    assert list(mmap_index.meta) == list(pickle_index.meta)
+    assert mmap_index.meta[-1] == pickle_index.meta[-1]
+
+
+def test_idf_round_trips(pickle_index, mmap_index):
+    assert mmap_index.idf == pickle_index.idf
+
+
+def test_document_vectors_round_trip(pickle_index, mmap_index):
+    expected = pickle_index.document_vectors()
+    got = mmap_index.document_vectors()
+    assert len(got) == len(expected)
+    for a, b in zip(got, expected):
+        assert a.keys() == b.keys()
+        assert a == pytest.approx(b)
+
+
+def test_postings_and_norms_round_trip(pickle_index, mmap_index):
+    assert set(mmap_index.postings) == set(pickle_index.postings)
+    for term in pickle_index.postings:
+        docs, weights = pickle_index.postings[term]
+        got_docs, got_weights = mmap_index.postings[term]
+        assert list(got_docs) == list(docs)
+        assert list(got_weights) == pytest.approx(list(weights))
+    assert list(mmap_index.norms) == pytest.approx(list(pickle_index.norms))
+
+
+def test_document_frequencies_round_trip(pickle_index, mmap_index):
+    assert mmap_index.document_frequencies() == pickle_index.document_frequencies()
+    assert "no-such-term" not in mmap_index.postings
+    assert mmap_index.postings.get("no-such-term") is None
@@ -0,0 +1,68 @@
+"""Request profiling runs one profiler at a time and never fails the request."""
+import threading
+
+import pytest
+
+from app.api.profiling import FORMATS, ProfileBuffer, RequestProfile, render
+
+
+def work(n=2000):
+    return sum(i * i for i in range(n))
+
+
+def test_a_profiled_call_returns_its_result():
+    profile = RequestProfile("GET", "/recommend", "header")
+    assert profile.run(work) == work()
+    assert profile.profiler is not None
+    assert any(func[2] == "work" for func in profile.stats())
+
+
+def test_overlapping_calls_run_unprofiled():
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    first = RequestProfile("GET", "/recommend", "header")
+    thread = threading.Thread(target=first.run, args=(slow,))
+    thread.start()
+    try:
+        assert started.wait(5)
+        second = RequestProfile("GET", "/recommend", "sample")
+        assert second.run(work) == work()
+        assert second.profiler is None
+    finally:
+        release.set()
+        thread.join()
+    assert first.profiler is not None
+
+    # the lock is free again once the first call is done
+    third = RequestProfile("GET", "/recommend", "header")
+    third.run(work)
+    assert third.profiler is not None
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_every_format_renders(fmt):
+    profile = RequestProfile("GET", "/recommend", "header")
+    profile.run(work)
+    body, media_type = render(profile, fmt)
+    assert body
+    assert media_type
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        render(RequestProfile("GET", "/", "header"), "svg")
+
+
+def test_buffer_keeps_the_latest_profiles():
+    buffer = ProfileBuffer(maxsize=2)
+    profiles = [RequestProfile("GET", f"/{i}", "header") for i in range(3)]
+    for p in profiles:
+        buffer.add(p)
+    assert [s["path"] for s in buffer.summaries()] == ["/2", "/1"]
+    assert buffer.get(profiles[0].id) is None
+    assert buffer.get(profiles[2].id) is profiles[2]
@@ -0,0 +1,123 @@
+"""Typo correction fixes typos of vocabulary terms and leaves real words alone."""
+import pytest
+
+from recommender.preprocessing import preprocess
+from recommender.spelling import LONG_TOKEN, MIN_TOKEN, SpellIndex, deletes, edit_distance, load_words
+
+TYPOS = {
+    "machin": "machine",
+    "lerning": "learning",
+    "netwrok": "network",
+    "reinforcment": "reinforcement",
+    "optimzation": "optimization",
+    "cryptograhy": "cryptography",
+    "procesing": "processing",
+}
+# not in the bundled vocabulary, and each within one or two edits of a term
+REAL_WORDS = ("drones", "drone", "rust", "llm", "vaccines", "compilers")
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("learning", "learning", 0),
+    ("lerning", "learning", 1),
+    ("netwrok", "network", 1),
+    ("machin", "machine", 1),
+    ("optimzation", "optimization", 1),
+    ("reinforcment", "reinforcement", 1),
+    ("graph", "grpah", 1),
+    ("vision", "fission", 2),
+    ("kitten", "sitting", 3),
+])
+def test_edit_distance(a, b, distance):
+    assert edit_distance(a, b, 3) == distance
+    assert edit_distance(b, a, 3) == distance
+
+
+def test_edit_distance_stops_at_the_limit():
+    assert edit_distance("kitten", "sitting", 1) == 2
+    assert edit_distance("a", "abcdef", 2) == 3
+
+
+def test_deletes():
+    assert deletes("abc", 1) == {"abc", "ab", "ac", "bc"}
+    assert "a" in deletes("abc", 2)
+
+
+@pytest.mark.parametrize("typo, term", TYPOS.items())
+def test_typos_of_vocabulary_terms_are_corrected(pickle_index, typo, term):
+    assert typo not in pickle_index.idf
+    assert pickle_index.spelling.correct(typo) == term
+
+
+@pytest.mark.parametrize("word", REAL_WORDS)
+def test_real_words_are_left_alone(pickle_index, word):
+    assert word not in pickle_index.idf
+    assert pickle_index.spelling.correct(word) is None
+
+
+def test_correct_tokens_merges_the_fixed_phrase(pickle_index):
+    tokens, fixes = pickle_index.correct_tokens(preprocess("machin lerning"))
+    assert tokens == ["machine_learning"]
+    assert fixes == {"machin": "machine", "lerning": "learning"}
+
+
+def test_known_tokens_are_not_touched(pickle_index):
+    tokens = preprocess("wireless networks")
+    assert pickle_index.correct_tokens(tokens) == (tokens, {})
+
+
+# ---------- the gates, on a vocabulary small enough to reason about ----------
+
+VOCAB = {
+    "cones": 5, "trust": 9, "machines": 3, "learning": 20, "rarely": 1,
+    "segmentation": 1, "reinforcement": 1, "computer_vision": 4, "computer": 6,
+}
+
+
+@pytest.fixture
+def spell():
+    return SpellIndex(VOCAB, max_distance=2, words=())
+
+
+def test_short_tokens_are_never_corrected(spell):
+    assert len("trst") < MIN_TOKEN
+    assert spell.correct("trst") is None
+
+
+def test_short_tokens_get_one_edit(spell):
+    assert spell.correct("lerning") == "learning"
+    assert spell.correct("lernng") is None
+
+
+def test_long_tokens_get_two_edits(spell):
+    assert len("segmentaton") >= LONG_TOKEN
+    assert spell.correct("segmnetaton") == "segmentation"
+
+
+def test_short_tokens_need_a_term_in_several_documents(spell):
+    assert spell.correct("rarelly") is None
+    # long tokens may go to a term in a single document
+    assert spell.correct("reinforcment") == "reinforcement"
+
+
+def test_first_letter_is_never_changed(spell):
+    assert spell.correct("vachines") is None
+    assert spell.correct("mchines") == "machines"
+
+
+def test_phrase_tokens_are_not_candidates(spell):
+    assert spell.correct("computer_visin") is None
+    assert spell.correct("computr") == "computer"
+
+
+def test_listed_words_are_never_corrected(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text("# our users' words\nLernings\n\nmchines\n")
+    assert load_words(path) == {"lernings", "mchines"}
+    spell = SpellIndex(VOCAB, max_distance=2, words=load_words(path))
+    assert spell.correct("mchines") is None
+    assert spell.correct("lerning") == "learning"
+
+
+def test_max_distance_zero_disables_correction():
+    assert SpellIndex(VOCAB, max_distance=0, words=()).correct("lerning") is None